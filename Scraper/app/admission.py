@@ -0,0 +1,186 @@
+# app/admission.py
+
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+# Retailer scrapes allowed to run at once across all requests in this process
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "20"))
+# Scrapes allowed to wait for a worker; beyond this new comparisons are turned away
+SCRAPE_QUEUE_LIMIT = int(os.getenv("SCRAPE_QUEUE_LIMIT", "100"))
+# Concurrent scrapes per retailer unless its registry entry sets max_concurrency
+RETAILER_MAX_CONCURRENCY = int(os.getenv("RETAILER_MAX_CONCURRENCY", "8"))
+
+class Overloaded(Exception):
+    """Raised when scraping capacity is exhausted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Scraping capacity is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class BulkheadFull(Exception):
+    """Raised instead of starting a scrape for a retailer already at its concurrency cap."""
+
+class Reservation:
+    """Scrape units an admitted comparison holds until it finishes.
+
+    Release is idempotent, and the reservation can be used as a context manager.
+    """
+
+    def __init__(self, capacity: "ScrapeCapacity", units: int):
+        self.capacity = capacity
+        self.units = units
+
+    def release(self) -> None:
+        if self.units:
+            self.capacity.reserved -= self.units
+            self.units = 0
+
+    def __enter__(self) -> "Reservation":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+class ScrapeCapacity:
+    """Process-wide budget of concurrent retailer scrapes with a bounded wait queue.
+
+    Every live scrape holds one of ``workers`` slots; at most ``max_queue``
+    scrapes wait for one. ``admit`` reserves a unit per retailer a new
+    comparison will scrape, and turns the comparison away up front when those
+    would not fit in the slots plus the queue, so a burst is refused at the
+    door instead of being admitted and then shed scrape by scrape.
+    """
+
+    def __init__(self, workers: int = SCRAPE_WORKERS, max_queue: int = SCRAPE_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_use = 0
+        self.waiting = 0
+        self.reserved = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.scrapes_rejected = 0
+        self._wait_times: deque = deque(maxlen=200)
+        self._avg_hold = 1.0
+
+    @property
+    def queued(self) -> int:
+        """Scrapes waiting for a slot, or bound to once the admitted ones start."""
+        return max(self.waiting, self.reserved - self.workers)
+
+    @property
+    def saturated(self) -> bool:
+        return self.queued >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Rough seconds until the current queue has drained."""
+        return max(1, math.ceil((self.queued / self.workers + 1) * self._avg_hold))
+
+    def admit(self, units: int = 1) -> Reservation:
+        """Reserve ``units`` scrapes for a new comparison, or raise Overloaded.
+
+        A comparison is always let in while nothing else is reserved, so one
+        with more retailers than the slots and queue together can still run.
+        """
+        if self.reserved and self.reserved + units > self.workers + self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+        self.admitted += 1
+        self.reserved += units
+        return Reservation(self, units)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one scrape slot, waiting in the bounded queue if all are busy."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            # An admitted comparison loses this retailer rather than growing the queue
+            self.scrapes_rejected += 1
+            raise Overloaded(self.retry_after())
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.monotonic()
+        self._wait_times.append(started_at - queued_at)
+        self.in_use += 1
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            self._slots.release()
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * (time.monotonic() - started_at)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_times)
+        return {
+            "workers": self.workers,
+            "in_use": self.in_use,
+            "queue_depth": self.waiting,
+            "reserved": self.reserved,
+            "queue_limit": self.max_queue,
+            "wait_p50_seconds": round(waits[len(waits) // 2], 3) if waits else 0.0,
+            "wait_p95_seconds": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "scrapes_rejected": self.scrapes_rejected,
+        }
+
+scrape_capacity = ScrapeCapacity()
+
+class Bulkhead:
+    """Caps the scrapes one retailer may run at once, so a slow site cannot take every slot.
+
+    Scrapes over the cap are not queued: they fail fast and the retailer is
+    left out of that comparison.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.active = 0
+        self.rejected = 0
+
+    @contextmanager
+    def enter(self) -> Iterator[None]:
+        if self.active >= self.limit:
+            self.rejected += 1
+            raise BulkheadFull(f"{self.name} already has {self.active} scrapes running (limit {self.limit})")
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": self.active, "limit": self.limit, "rejected": self.rejected}
+
+class BulkheadRegistry:
+    """One bulkhead per retailer, created on first use with the entry's max_concurrency."""
+
+    def __init__(self, default_limit: int = RETAILER_MAX_CONCURRENCY):
+        self.default_limit = default_limit
+        self._bulkheads: Dict[str, Bulkhead] = {}
+
+    def get(self, retailer: Dict[str, Any]) -> Bulkhead:
+        name = retailer["name"]
+        limit = retailer.get("max_concurrency", self.default_limit)
+        bulkhead = self._bulkheads.get(name)
+        if bulkhead is None:
+            bulkhead = self._bulkheads[name] = Bulkhead(name, limit)
+        bulkhead.limit = max(1, limit)  # Follow registry edits without a restart
+        return bulkhead
+
+    def states(self) -> Dict[str, Dict[str, int]]:
+        return {name: bulkhead.stats() for name, bulkhead in sorted(self._bulkheads.items())}
+
+retailer_bulkheads = BulkheadRegistry()
@@ -0,0 +1,192 @@
+# app/browser_pool.py
+
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, Playwright
+
+# Pool configuration
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "1"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "4"))
+BROWSER_RECYCLE_AFTER = int(os.getenv("BROWSER_RECYCLE_AFTER", "100"))
+PAGE_TIMEOUT_MS = 15000
+
+class _PooledBrowser:
+    """A browser process together with its usage counters."""
+
+    def __init__(self, browser: "Browser"):
+        self.browser = browser
+        self.active_pages = 0
+        self.pages_served = 0
+        self.retiring = False
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser.is_connected() and not self.retiring
+
+class BrowserPool:
+    """Process-wide pool of headless Chromium browsers.
+
+    Each borrow gets a fresh browser context (isolated cookies and storage)
+    with a single page. The number of concurrently open pages is bounded, and
+    browsers are restarted after serving a fixed number of pages or when they
+    crash.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_pages: int = BROWSER_MAX_PAGES,
+                 recycle_after: int = BROWSER_RECYCLE_AFTER):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.recycle_after = max(1, recycle_after)
+        self._playwright: Optional["Playwright"] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._page_slots: Optional[asyncio.Semaphore] = None
+        self._lock = asyncio.Lock()
+        self._start_lock = asyncio.Lock()
+        self._waiting = 0
+        self._restarts = 0
+        self._pages_served = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self) -> None:
+        """Launch the Playwright driver and the pooled browsers."""
+        async with self._start_lock:
+            if self.started:
+                return
+            self._page_slots = asyncio.Semaphore(self.max_pages)
+            # Imported on first launch so processes that never render skip the driver
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+            try:
+                for _ in range(self.size):
+                    self._browsers.append(await self._launch())
+            except Exception:
+                await self.stop()
+                raise
+        print(f"Browser pool started: {self.size} browser(s), {self.max_pages} page slot(s)")
+
+    async def stop(self) -> None:
+        """Close all browsers and stop the Playwright driver."""
+        if not self.started:
+            return
+        for pooled in self._browsers:
+            await self._close(pooled)
+        self._browsers = []
+        await self._playwright.stop()
+        self._playwright = None
+        print("Browser pool stopped")
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(headless=True)
+        return _PooledBrowser(browser)
+
+    async def _close(self, pooled: _PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"Error closing pooled browser: {e}")
+
+    async def _acquire_browser(self) -> _PooledBrowser:
+        """Pick the least busy healthy browser, replacing crashed or worn-out ones."""
+        async with self._lock:
+            for index, pooled in enumerate(self._browsers):
+                if pooled.browser.is_connected():
+                    continue
+                print("Pooled browser disconnected, restarting it")
+                self._browsers[index] = await self._launch()
+                self._restarts += 1
+
+            candidates = [pooled for pooled in self._browsers if pooled.healthy]
+            if not candidates:
+                pooled = await self._launch()
+                self._browsers.append(pooled)
+                self._restarts += 1
+                candidates = [pooled]
+
+            pooled = min(candidates, key=lambda b: b.active_pages)
+            pooled.active_pages += 1
+            pooled.pages_served += 1
+            self._pages_served += 1
+            if pooled.pages_served >= self.recycle_after:
+                # Stop handing out this browser; it is replaced once its pages are done
+                pooled.retiring = True
+            return pooled
+
+    async def _release_browser(self, pooled: _PooledBrowser) -> None:
+        async with self._lock:
+            pooled.active_pages -= 1
+            if not pooled.retiring or pooled.active_pages > 0:
+                return
+            if pooled in self._browsers:
+                self._browsers.remove(pooled)
+                self._browsers.append(await self._launch())
+                self._restarts += 1
+        await self._close(pooled)
+
+    @asynccontextmanager
+    async def page(self, user_agent: Optional[str] = None) -> AsyncIterator["Page"]:
+        """Borrow a page in a fresh browser context, waiting for a free slot."""
+        if not self.started:
+            await self.start()
+
+        self._waiting += 1
+        try:
+            await self._page_slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            pooled = await self._acquire_browser()
+            try:
+                context = await pooled.browser.new_context(user_agent=user_agent)
+                try:
+                    page = await context.new_page()
+                    page.set_default_timeout(PAGE_TIMEOUT_MS)
+                    yield page
+                finally:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        print(f"Error closing browser context: {e}")
+            except Exception:
+                if not pooled.browser.is_connected():
+                    pooled.retiring = True
+                raise
+            finally:
+                await self._release_browser(pooled)
+        finally:
+            self._page_slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report current pool occupancy."""
+        active = sum(pooled.active_pages for pooled in self._browsers)
+        return {
+            "started": self.started,
+            "browsers": len(self._browsers),
+            "max_pages": self.max_pages,
+            "active_pages": active,
+            "free_pages": self.max_pages - active,
+            "waiting": self._waiting,
+            "pages_served": self._pages_served,
+            "restarts": self._restarts,
+        }
+
+browser_pool = BrowserPool()
+
+async def render_page(url: str, wait_for: Optional[str] = None, user_agent: Optional[str] = None,
+                      wait_timeout: int = 10000) -> str:
+    """Load a URL in a pooled browser and return the rendered HTML."""
+    async with browser_pool.page(user_agent=user_agent) as page:
+        await page.goto(url, wait_until='domcontentloaded')
+        if wait_for:
+            try:
+                await page.wait_for_selector(wait_for, timeout=wait_timeout)
+            except Exception:
+                pass  # Continue even if selector not found
+        return await page.content()
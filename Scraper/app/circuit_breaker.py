@@ -0,0 +1,123 @@
+# app/circuit_breaker.py
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+# Consecutive failed attempts (errors, 5xx, 429) that open a domain's circuit
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open circuit fails fast before letting a probe request through
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "30"))
+# Upper bound on a cool-down stretched by a retailer's Retry-After header
+BREAKER_MAX_COOLDOWN_SECONDS = float(os.getenv("BREAKER_MAX_COOLDOWN_SECONDS", "300"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a domain whose circuit is open."""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one domain.
+
+    Closed: requests flow and failures are counted. Open: requests fail fast
+    until the cool-down ends. Half-open: one probe request is let through;
+    its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, domain: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.domain = domain
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.retry_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_started_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; moves an expired open circuit to half-open."""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now >= self.retry_at:
+            self.state = HALF_OPEN
+            self._probe_started_at = None
+            print(f"Circuit for {self.domain} half-open, sending a probe")
+        # A probe that never reported back (cancelled, timed out) is replaced after a cool-down
+        if self.state == HALF_OPEN and (self._probe_started_at is None
+                                        or now - self._probe_started_at >= self.cooldown):
+            self._probe_started_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def check(self) -> None:
+        if not self.allow():
+            raise CircuitOpenError(
+                f"Circuit open for {self.domain}, retrying in {max(0.0, self.retry_at - time.monotonic()):.0f}s"
+            )
+
+    @property
+    def is_open(self) -> bool:
+        """Open and still cooling down; an expired cool-down counts as closed for routing."""
+        return self.state == OPEN and time.monotonic() < self.retry_at
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            print(f"Circuit for {self.domain} closed")
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_started_at = None
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        self.failures += 1
+        if self.state == OPEN:
+            return  # A request that was already in flight; keep the current cool-down
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open(retry_after)
+
+    def _open(self, retry_after: Optional[float]) -> None:
+        cooldown = self.cooldown
+        if retry_after:
+            cooldown = min(max(cooldown, retry_after), BREAKER_MAX_COOLDOWN_SECONDS)
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.retry_at = self.opened_at + cooldown
+        self.times_opened += 1
+        self._probe_started_at = None
+        print(f"Circuit for {self.domain} opened after {self.failures} failures, cooling down {cooldown:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": OPEN if self.is_open else (HALF_OPEN if self.state != CLOSED else CLOSED),
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(max(0.0, self.retry_at - time.monotonic()), 1) if self.is_open else 0.0,
+        }
+
+class BreakerRegistry:
+    """One circuit breaker per domain, created on first use."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, domain: str) -> CircuitBreaker:
+        breaker = self._breakers.get(domain)
+        if breaker is None:
+            breaker = self._breakers[domain] = CircuitBreaker(domain)
+        return breaker
+
+    def is_open(self, domain: str) -> bool:
+        breaker = self._breakers.get(domain)
+        return breaker is not None and breaker.is_open
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        return {domain: breaker.stats() for domain, breaker in sorted(self._breakers.items())}
+
+domain_breakers = BreakerRegistry()
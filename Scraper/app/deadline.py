@@ -0,0 +1,56 @@
+# app/deadline.py
+
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+from tenacity import RetryCallState
+from tenacity.stop import stop_base
+
+class DeadlineExceeded(Exception):
+    """Raised when work is attempted after its time budget has run out."""
+
+class Deadline:
+    """An absolute point in time by which a unit of work must finish."""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def child(self, budget: Optional[float] = None, reserve: float = 0.0) -> "Deadline":
+        """A deadline that ends no later than this one, minus ``reserve`` seconds."""
+        available = max(0.0, self.remaining() - reserve)
+        return Deadline(available if budget is None else min(budget, available))
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.2f}s)"
+
+# Deadline of the work running in the current task, read by the fetch layer
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+def get_deadline() -> Optional[Deadline]:
+    return current_deadline.get()
+
+class stop_at_deadline(stop_base):
+    """Tenacity stop condition: give up when the next wait plus an attempt would overrun.
+
+    ``wait`` is the wait strategy used by the same retry policy, so the check
+    accounts for the backoff that would precede the next attempt.
+    """
+
+    def __init__(self, wait: Callable[[RetryCallState], float], min_attempt_seconds: float = 1.0):
+        self.wait = wait
+        self.min_attempt_seconds = min_attempt_seconds
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        deadline = get_deadline()
+        if deadline is None:
+            return False
+        return deadline.remaining() < self.wait(retry_state) + self.min_attempt_seconds
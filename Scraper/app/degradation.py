@@ -0,0 +1,81 @@
+# app/degradation.py
+
+import os
+from contextvars import ContextVar
+from typing import Any, Dict, List
+from app.admission import ScrapeCapacity
+
+# Load at which each tier starts: the scrape queue's fill fraction, counting
+# scrapes reserved by admitted comparisons, or the 1-minute load average per
+# core when DEGRADE_ON_CPU is set
+DEGRADE_NO_RENDER_AT = float(os.getenv("DEGRADE_NO_RENDER_AT", "0.25"))
+DEGRADE_PRIORITY_ONLY_AT = float(os.getenv("DEGRADE_PRIORITY_ONLY_AT", "0.5"))
+DEGRADE_CACHE_ONLY_AT = float(os.getenv("DEGRADE_CACHE_ONLY_AT", "0.8"))
+DEGRADE_ON_CPU = os.getenv("DEGRADE_ON_CPU", "false").lower() == "true"
+# Registry priority kept in the priority_only tier (lower number = higher priority)
+DEGRADE_MAX_PRIORITY = int(os.getenv("DEGRADE_MAX_PRIORITY", "2"))
+
+# Quality-of-service tiers, from full coverage to cached results only
+FULL = "full"
+NO_RENDER = "no_render"
+PRIORITY_ONLY = "priority_only"
+CACHE_ONLY = "cache_only"
+TIERS = (FULL, NO_RENDER, PRIORITY_ONLY, CACHE_ONLY)
+
+# Tier of the comparison running in the current task, read by the scrapers
+current_tier: ContextVar[str] = ContextVar("current_tier", default=FULL)
+
+def _cpu_pressure() -> float:
+    if not DEGRADE_ON_CPU or not hasattr(os, "getloadavg"):
+        return 0.0
+    return os.getloadavg()[0] / (os.cpu_count() or 1)
+
+class DegradationPolicy:
+    """Picks a service tier from the current scraping load.
+
+    Each step trades coverage for throughput: first the Playwright fallback
+    goes, then retailers below DEGRADE_MAX_PRIORITY, then live scraping
+    altogether in favour of cached comparisons.
+    """
+
+    def __init__(self, capacity: ScrapeCapacity):
+        self.capacity = capacity
+        self.served: Dict[str, int] = {tier: 0 for tier in TIERS}
+
+    def pressure(self) -> float:
+        # Reserved scrapes count before they reach the queue, so a burst of
+        # admitted comparisons steps the tier down before its scrapes start
+        queue = self.capacity.queued / self.capacity.max_queue if self.capacity.max_queue else 0.0
+        return max(queue, _cpu_pressure())
+
+    def tier(self) -> str:
+        """Tier for a comparison starting now; also counted as served."""
+        pressure = self.pressure()
+        if pressure >= DEGRADE_CACHE_ONLY_AT:
+            tier = CACHE_ONLY
+        elif pressure >= DEGRADE_PRIORITY_ONLY_AT:
+            tier = PRIORITY_ONLY
+        elif pressure >= DEGRADE_NO_RENDER_AT:
+            tier = NO_RENDER
+        else:
+            tier = FULL
+        self.served[tier] += 1
+        if tier != FULL:
+            print(f"Serving at degraded tier {tier} (pressure {pressure:.2f})")
+        return tier
+
+    @staticmethod
+    def retailers_for(tier: str, retailers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Retailers to scrape live at a tier."""
+        if tier == CACHE_ONLY:
+            return []
+        if tier == PRIORITY_ONLY:
+            return [retailer for retailer in retailers if retailer.get("priority", 999) <= DEGRADE_MAX_PRIORITY]
+        return retailers
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pressure": round(self.pressure(), 3), "served": dict(self.served)}
+
+def render_allowed() -> bool:
+    """Whether scrapers may fall back to a browser-rendered page."""
+    return current_tier.get() == FULL
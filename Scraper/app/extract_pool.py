@@ -0,0 +1,178 @@
+# app/extract_pool.py
+
+import os
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from app.models import Offer
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, ProcessPoolExecutor
+
+# Worker processes for HTML parsing and matching: 0 runs extraction in a
+# thread off the event loop, "auto" uses one worker per CPU core
+EXTRACT_WORKERS = os.getenv("EXTRACT_WORKERS", "0")
+# Markup bytes allowed in flight to the workers; further pages wait their turn
+EXTRACT_MAX_INFLIGHT_BYTES = int(os.getenv("EXTRACT_MAX_INFLIGHT_BYTES", str(64 * 1024 * 1024)))
+
+# (link, price, currency, productName, price_numeric) per offer; the source is shared by the page
+OfferTuple = Tuple[str, str, str, str, float]
+StatsTuple = Tuple[int, int, int, int, int]
+STATS_FIELDS = ("products", "with_name", "with_price", "rejected", "kept")
+
+def _worker_count() -> int:
+    if EXTRACT_WORKERS.strip().lower() == "auto":
+        return os.cpu_count() or 1
+    return max(0, int(EXTRACT_WORKERS))
+
+# Worker side
+
+_worker_specs: Dict[str, Any] = {}
+
+def _init_worker() -> None:
+    import app.scraper  # noqa: F401  Import once per worker, not on the first page
+
+def _worker_spec(key: str, config: Dict[str, Any]):
+    from app.retailer_specs import SPECS, RetailerSpec
+    spec = SPECS.get(key)
+    if spec is not None and spec.config == config:
+        return spec
+    cached = _worker_specs.get(key)
+    if cached is None or cached.config != config:
+        cached = _worker_specs[key] = RetailerSpec(key, config)
+    return cached
+
+def _extract_in_worker(spec_key: str, spec_config: Dict[str, Any], markup: str,
+                       product_info: Dict[str, Any], page_url: str
+                       ) -> Tuple[List[OfferTuple], str, StatsTuple]:
+    """Run extract_offers in a worker and return it in compact, cheap-to-pickle form."""
+    from app.scraper import extract_offers
+    offers, stats = extract_offers(markup, _worker_spec(spec_key, spec_config), product_info, page_url)
+    source = offers[0].source if offers else ""
+    return (
+        [(offer.link, offer.price, offer.currency, offer.productName, offer.price_numeric) for offer in offers],
+        source,
+        tuple(stats[field] for field in STATS_FIELDS),
+    )
+
+# Parent side
+
+class ExtractionPool:
+    """Persistent process pool for the CPU-bound part of scraping.
+
+    Fetching stays on the event loop; raw markup and the parsed query are sent
+    to a worker, which parses, walks the selectors, matches and cleans prices,
+    and sends back offer tuples. Markup in flight is capped in bytes so a
+    burst of large pages cannot queue unbounded memory in the pool; a page
+    counts until its worker is done with it, even if its caller gave up.
+    """
+
+    def __init__(self, workers: int, max_inflight_bytes: int = EXTRACT_MAX_INFLIGHT_BYTES):
+        self.workers = workers
+        self.max_inflight_bytes = max_inflight_bytes
+        self._executor: Optional["ProcessPoolExecutor"] = None
+        self._fallback_executor: Optional["Executor"] = None
+        self._inflight_bytes = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self.pages = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> "ProcessPoolExecutor":
+        if self._executor is None:
+            # multiprocessing is only imported once a pool is actually used
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # Spawned workers do not inherit the event loop, threads or open sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            print(f"Started extraction pool with {self.workers} workers")
+        return self._executor
+
+    async def _acquire(self, size: int) -> None:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            # An oversized page may still go alone, so it cannot block forever
+            await self._condition.wait_for(
+                lambda: self._inflight_bytes == 0 or self._inflight_bytes + size <= self.max_inflight_bytes
+            )
+            self._inflight_bytes += size
+
+    def _release(self, size: int) -> None:
+        self._inflight_bytes -= size
+        asyncio.ensure_future(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
+
+    async def _run(self, executor: "Executor", size: int, *args: Any):
+        """Run _extract_in_worker on ``executor`` with ``size`` bytes counted in flight.
+
+        The bytes are released when the job ends, not when the caller stops
+        waiting: a cancelled caller leaves the worker parsing the page.
+        """
+        await self._acquire(size)
+        loop = asyncio.get_running_loop()
+        try:
+            job = executor.submit(_extract_in_worker, *args)
+        except BaseException:
+            self._release(size)
+            raise
+
+        def job_done(_) -> None:
+            try:
+                loop.call_soon_threadsafe(self._release, size)
+            except RuntimeError:  # The loop is closed; nobody is left waiting
+                self._inflight_bytes -= size
+
+        job.add_done_callback(job_done)
+        return await asyncio.wrap_future(job)
+
+    def _get_fallback_executor(self) -> "Executor":
+        if self._fallback_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._fallback_executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                         thread_name_prefix="extract-fallback")
+        return self._fallback_executor
+
+    async def extract(self, markup: str, spec, product_info: Dict[str, Any],
+                      page_url: str) -> Tuple[List[Offer], Dict[str, int]]:
+        from concurrent.futures.process import BrokenProcessPool
+        size = len(markup)
+        args = (spec.key, spec.config, markup, product_info, page_url)
+        try:
+            result = await self._run(self._get_executor(), size, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool and retry in a thread
+            print("Extraction pool broken, restarting it")
+            self.shutdown()
+            self.restarts += 1
+            result = await self._run(self._get_fallback_executor(), size, *args)
+        self.pages += 1
+
+        offer_tuples, source, stats = result
+        offers = [
+            Offer(link, price, currency, name, source, price_numeric)
+            for link, price, currency, name, price_numeric in offer_tuples
+        ]
+        return offers, dict(zip(STATS_FIELDS, stats))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "started": self._executor is not None,
+            "inflight_bytes": self._inflight_bytes,
+            "pages": self.pages,
+            "restarts": self.restarts,
+        }
+
+_workers = _worker_count()
+extraction_pool: Optional[ExtractionPool] = ExtractionPool(_workers) if _workers > 0 else None
@@ -0,0 +1,257 @@
+# app/fetch_cache.py
+
+import os
+import time
+import uuid
+import zlib
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import httpx
+from app.deadline import get_deadline
+
+# SQLite file shared by every worker process; empty disables the fetch cache
+FETCH_CACHE_PATH = os.getenv("FETCH_CACHE_PATH", "")
+# Default freshness for cached search pages; retailer specs may override it
+FETCH_CACHE_TTL_SECONDS = float(os.getenv("FETCH_CACHE_TTL_SECONDS", "300"))
+# Expired pages kept this long so they can be revalidated with ETag/Last-Modified
+FETCH_CACHE_KEEP_SECONDS = float(os.getenv("FETCH_CACHE_KEEP_SECONDS", "86400"))
+FETCH_CACHE_MAX_BYTES = int(os.getenv("FETCH_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+# How long one process may hold the right to fetch a URL before others take over
+FETCH_LEASE_SECONDS = float(os.getenv("FETCH_LEASE_SECONDS", "30"))
+FETCH_LEASE_POLL_SECONDS = 0.1
+
+# Request headers that change the response and so belong in the cache key
+KEY_HEADERS = ("accept-language",)
+
+HIT = "hit"
+REVALIDATED = "revalidated"
+MISS = "miss"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+Fetcher = Callable[[Dict[str, str]], Awaitable[httpx.Response]]
+
+class _Cached:
+    __slots__ = ("content_type", "etag", "last_modified", "body", "expires_at")
+
+    def __init__(self, row: Tuple):
+        self.content_type, self.etag, self.last_modified, body, self.expires_at = row
+        self.body = zlib.decompress(body)
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+class FetchCache:
+    """Raw HTTP response cache in SQLite, shared by all worker processes.
+
+    Bodies are zlib-compressed and evicted least-recently-used once the file
+    holds more than ``max_bytes`` of them. Expired pages with an ETag or
+    Last-Modified are revalidated with a conditional request. A lease row
+    makes sure only one process fetches a given URL at a time; the others
+    wait for its result instead of sending their own request.
+    """
+
+    def __init__(self, path: str, max_bytes: int = FETCH_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.waits = 0
+
+    def _db(self) -> sqlite3.Connection:
+        """Connection for the calling thread, set up for concurrent multi-process use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(url: str, headers: Optional[Dict[str, str]]) -> str:
+        lowered = {name.lower(): value for name, value in (headers or {}).items()}
+        parts = [url] + [f"{name}={lowered.get(name, '')}" for name in KEY_HEADERS]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    # Blocking helpers, run in worker threads
+
+    def _load(self, key: str) -> Optional[_Cached]:
+        row = self._db().execute(
+            "SELECT content_type, etag, last_modified, body, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return _Cached(row)
+        except zlib.error:
+            self._db().execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+
+    def _touch(self, key: str, expires_at: Optional[float] = None) -> None:
+        now = time.time()
+        if expires_at is None:
+            self._db().execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        else:
+            self._db().execute("UPDATE responses SET accessed_at = ?, expires_at = ? WHERE key = ?",
+                               (now, expires_at, key))
+
+    def _store(self, key: str, url: str, response: httpx.Response, ttl: float) -> None:
+        body = zlib.compress(response.content, 6)
+        now = time.time()
+        content_type = response.headers.get("content-type", "text/html")
+        self._db().execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, url, content_type, etag, last_modified, body, size, stored_at, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, url, content_type, response.headers.get("etag"), response.headers.get("last-modified"),
+             body, len(body), now, now + ttl, now),
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        conn = self._db()
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time() - FETCH_CACHE_KEEP_SECONDS,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so a full cache does not evict on every store
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def _acquire_lease(self, key: str, owner: str) -> bool:
+        now = time.time()
+        cursor = self._db().execute(
+            "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at < ?",
+            (key, owner, now + FETCH_LEASE_SECONDS, now),
+        )
+        return cursor.rowcount == 1
+
+    def _release_lease(self, key: str, owner: str) -> None:
+        self._db().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def _lease_held(self, key: str) -> bool:
+        row = self._db().execute("SELECT expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    # Async API
+
+    async def fetch(self, url: str, headers: Dict[str, str], fetcher: Fetcher,
+                    ttl: float = FETCH_CACHE_TTL_SECONDS) -> httpx.Response:
+        """Return the cached page for a URL, or fetch it (once across processes) and cache it.
+
+        ``fetcher`` sends the real request with the given headers plus any
+        conditional headers, and must return 304 responses without raising.
+        """
+        key = self.key(url, headers)
+        cached = await asyncio.to_thread(self._load, key)
+        if cached is not None and cached.fresh:
+            await asyncio.to_thread(self._touch, key)
+            self.hits += 1
+            return self._response(url, cached, HIT)
+
+        # Each call holds its own lease, so concurrent callers in this process wait too
+        owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        if not await asyncio.to_thread(self._acquire_lease, key, owner):
+            # Another worker is fetching this URL; wait for it instead of duplicating the request
+            self.waits += 1
+            cached = await self._wait_for_peer(key) or cached
+            if cached is not None and cached.fresh:
+                self.hits += 1
+                return self._response(url, cached, HIT)
+
+        try:
+            request_headers = dict(headers)
+            if cached is not None:
+                if cached.etag:
+                    request_headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    request_headers["If-Modified-Since"] = cached.last_modified
+            response = await fetcher(request_headers)
+
+            if response.status_code == 304 and cached is not None:
+                await asyncio.to_thread(self._touch, key, time.time() + ttl)
+                self.revalidated += 1
+                return self._response(url, cached, REVALIDATED)
+
+            self.misses += 1
+            if response.status_code == 200:
+                await response.aread()
+                await asyncio.to_thread(self._store, key, url, response, ttl)
+            response.headers["x-fetch-cache"] = MISS
+            return response
+        finally:
+            await asyncio.to_thread(self._release_lease, key, owner)
+
+    async def _wait_for_peer(self, key: str) -> Optional[_Cached]:
+        deadline = get_deadline()
+        give_up_at = time.monotonic() + FETCH_LEASE_SECONDS
+        if deadline is not None:
+            give_up_at = min(give_up_at, deadline.expires_at)
+        while time.monotonic() < give_up_at:
+            await asyncio.sleep(FETCH_LEASE_POLL_SECONDS)
+            cached = await asyncio.to_thread(self._load, key)
+            if cached is not None and cached.fresh:
+                return cached
+            if not await asyncio.to_thread(self._lease_held, key):
+                return cached  # The other worker finished without caching (error or non-200)
+        return None
+
+    @staticmethod
+    def _response(url: str, cached: _Cached, status: str) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"content-type": cached.content_type, "x-fetch-cache": status},
+            content=cached.body,
+            request=httpx.Request("GET", url),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                 "peer_waits": self.waits}
+        try:
+            entries, size = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            stats.update(entries=entries, bytes=size)
+        except sqlite3.Error as e:
+            stats["error"] = str(e)
+        return stats
+
+fetch_cache: Optional[FetchCache] = FetchCache(FETCH_CACHE_PATH) if FETCH_CACHE_PATH else None
@@ -0,0 +1,88 @@
+# app/fixtures.py
+
+import os
+import json
+import hashlib
+from typing import Optional
+from urllib.parse import urlparse
+import httpx
+
+# Fetch mode for make_request:
+#   live    normal network fetches
+#   record  network fetches, successful responses saved to FIXTURE_DIR
+#   replay  responses served from FIXTURE_DIR, never touching the network
+FETCH_MODE = os.getenv("FETCH_MODE", "live")
+FIXTURE_DIR = os.getenv("FIXTURE_DIR", "fixtures")
+
+FETCH_MODES = ("live", "record", "replay")
+
+class FixtureNotFound(Exception):
+    """Raised in replay mode when no fixture was recorded for a URL."""
+
+def configure(mode: Optional[str] = None, fixture_dir: Optional[str] = None) -> None:
+    """Switch fetch mode or fixture directory at runtime (used by the benchmarks)."""
+    global FETCH_MODE, FIXTURE_DIR
+    if mode is not None:
+        if mode not in FETCH_MODES:
+            raise ValueError(f"Unknown FETCH_MODE '{mode}'. Choose from {FETCH_MODES}")
+        FETCH_MODE = mode
+    if fixture_dir is not None:
+        FIXTURE_DIR = fixture_dir
+
+def fixture_path(url: str, kind: str = "fetch") -> str:
+    """File a URL's response is stored in; the host prefix keeps the corpus browsable.
+    
+    ``kind`` separates plain fetches from browser-rendered pages of the same URL.
+    """
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    host = urlparse(url).netloc.replace(":", "_") or "local"
+    prefix = host if kind == "fetch" else f"{host}-{kind}"
+    return os.path.join(FIXTURE_DIR, f"{prefix}-{digest}.json")
+
+def save_fixture(url: str, status_code: int, text: str, content_type: str = "text/html",
+                 kind: str = "fetch") -> str:
+    """Write a response to the fixture corpus atomically and return its path.
+    
+    Bodies are stored decoded, so replayed responses are always served as UTF-8.
+    """
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = fixture_path(url, kind)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "status_code": status_code, "content_type": content_type, "text": text}, f)
+    os.replace(tmp_path, path)
+    return path
+
+def record_response(url: str, response: httpx.Response) -> None:
+    try:
+        content_type = response.headers.get("content-type", "text/html").split(";")[0].strip()
+        save_fixture(url, response.status_code, response.text, content_type)
+    except OSError as e:
+        print(f"Could not record fixture for {url}: {e}")
+
+def record_rendered(url: str, content: str) -> None:
+    try:
+        save_fixture(url, 200, content, kind="rendered")
+    except OSError as e:
+        print(f"Could not record rendered fixture for {url}: {e}")
+
+def _load(url: str, kind: str) -> dict:
+    try:
+        with open(fixture_path(url, kind), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise FixtureNotFound(f"No {kind} fixture for {url} in {FIXTURE_DIR}") from None
+
+def load_rendered(url: str) -> str:
+    """Recorded browser-rendered HTML for a URL."""
+    return _load(url, "rendered")["text"]
+
+def load_response(url: str) -> httpx.Response:
+    """Rebuild the recorded response for a URL."""
+    fixture = _load(url, "fetch")
+    return httpx.Response(
+        fixture["status_code"],
+        headers={"content-type": f"{fixture.get('content_type', 'text/html')}; charset=utf-8"},
+        content=fixture["text"].encode("utf-8"),
+        request=httpx.Request("GET", url),
+    )
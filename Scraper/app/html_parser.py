@@ -0,0 +1,127 @@
+# app/html_parser.py
+
+import os
+from importlib.util import find_spec
+from typing import List, Optional, Union
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Optional fast backend
+    LexborHTMLParser = None
+
+# BeautifulSoup, soupsieve and lxml are only imported once a soup backend is used
+LXML_AVAILABLE = find_spec("lxml") is not None
+
+# Parser backend: "selectolax" (C, fastest), "lxml" or "html.parser" (pure Python)
+HTML_PARSER = os.getenv("HTML_PARSER", "selectolax")
+
+BACKENDS = ("selectolax", "lxml", "html.parser")
+
+class Selector:
+    """A CSS selector compiled once and reused across documents and backends."""
+
+    __slots__ = ("css", "_compiled")
+
+    def __init__(self, css: str):
+        self.css = css
+        self._compiled = None
+
+    @property
+    def compiled(self):
+        """Soupsieve pattern used by the BeautifulSoup backends."""
+        if self._compiled is None:
+            import soupsieve
+            self._compiled = soupsieve.compile(self.css)
+        return self._compiled
+
+    def __repr__(self) -> str:
+        return f"Selector({self.css!r})"
+
+SelectorLike = Union[str, Selector]
+
+def _as_selector(selector: SelectorLike) -> Selector:
+    return selector if isinstance(selector, Selector) else Selector(selector)
+
+class Node:
+    """Backend-independent view of an HTML element."""
+
+    __slots__ = ()
+
+    def select(self, selector: SelectorLike) -> List["Node"]:
+        raise NotImplementedError
+
+    def select_one(self, selector: SelectorLike) -> Optional["Node"]:
+        raise NotImplementedError
+
+    def text(self, strip: bool = True) -> str:
+        """Element text; with strip, each text fragment is stripped and joined."""
+        raise NotImplementedError
+
+    def attr(self, name: str, default: str = "") -> str:
+        raise NotImplementedError
+
+class SoupNode(Node):
+    __slots__ = ("_tag",)
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    def select(self, selector: SelectorLike) -> List[Node]:
+        return [SoupNode(tag) for tag in _as_selector(selector).compiled.select(self._tag)]
+
+    def select_one(self, selector: SelectorLike) -> Optional[Node]:
+        tag = _as_selector(selector).compiled.select_one(self._tag)
+        return SoupNode(tag) if tag is not None else None
+
+    def text(self, strip: bool = True) -> str:
+        return self._tag.get_text(strip=strip)
+
+    def attr(self, name: str, default: str = "") -> str:
+        value = self._tag.get(name)
+        if isinstance(value, list):
+            value = " ".join(value)
+        return value if value is not None else default
+
+class LexborNode(Node):
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, selector: SelectorLike) -> List[Node]:
+        return [LexborNode(node) for node in self._node.css(_as_selector(selector).css)]
+
+    def select_one(self, selector: SelectorLike) -> Optional[Node]:
+        node = self._node.css_first(_as_selector(selector).css)
+        return LexborNode(node) if node is not None else None
+
+    def text(self, strip: bool = True) -> str:
+        return self._node.text(deep=True, strip=strip)
+
+    def attr(self, name: str, default: str = "") -> str:
+        value = self._node.attributes.get(name)
+        return value if value is not None else default
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Pick the configured backend, falling back when its library is missing."""
+    backend = backend or HTML_PARSER
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend '{backend}'. Choose from {BACKENDS}")
+    if backend == "selectolax" and LexborHTMLParser is None:
+        backend = "lxml"
+    if backend == "lxml" and not LXML_AVAILABLE:
+        backend = "html.parser"
+    return backend
+
+def available_backends() -> List[str]:
+    """Backends whose libraries are installed."""
+    return [backend for backend in BACKENDS if resolve_backend(backend) == backend]
+
+def parse_html(markup: str, backend: Optional[str] = None) -> Node:
+    """Parse an HTML document and return its root node."""
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        tree = LexborHTMLParser(markup)
+        return LexborNode(tree.root if tree.root is not None else tree)
+    from bs4 import BeautifulSoup
+    return SoupNode(BeautifulSoup(markup, backend))
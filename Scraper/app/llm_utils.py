@@ -1,18 +1,161 @@
 import os
 import json
+import atexit
+import tempfile
 import re
+import copy
+import time
+import threading
+import unicodedata
+from contextlib import contextmanager
 from dotenv import load_dotenv
-import google.generativeai as genai
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from app.cache import TTLCache, FRESH
+from app.metrics import llm_parse_latency, llm_parses
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
 
-def parse_query_with_gemini(query: str) -> Dict[str, Any]:
-    """Parse product query using Gemini AI to extract structured information."""
+# Parse cache configuration
+PARSE_CACHE_TTL_SECONDS = int(os.getenv("PARSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "5000"))
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", "")
+# New parses are written to PARSE_CACHE_PATH at most once per interval
+PARSE_CACHE_SAVE_INTERVAL_SECONDS = float(os.getenv("PARSE_CACHE_SAVE_INTERVAL_SECONDS", "5"))
+
+# Number of queries sent to Gemini in one batched prompt
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "20"))
+
+_model = None
+_model_lock = threading.Lock()
+
+parse_cache = TTLCache(ttl=PARSE_CACHE_TTL_SECONDS, max_entries=PARSE_CACHE_MAX_ENTRIES)
+_parse_cache_loaded = False
+_parse_cache_file_lock = threading.Lock()
+_save_timer: Optional[threading.Timer] = None
+
+def get_gemini_model():
+    """Get the shared Gemini model, creating it on first use.
+    
+    The Gemini SDK is imported and configured here rather than at import time,
+    since it is the slowest import in the app and cold starts rarely need it.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                _model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _model
+
+def _is_query_separator(char: str) -> bool:
+    # Punctuation and whitespace only; letters in any script, digits, marks and
+    # symbols such as "+" (Galaxy S24+) are part of the product
+    return char.isspace() or (unicodedata.category(char)[0] in "PZ" and char != "+")
+
+def canonicalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry.
+    
+    NFKC folds full-width and compatibility forms, casefold() folds case in
+    any script, and runs of punctuation and whitespace become one space.
+    Returns "" for a query with nothing else in it; callers must not share
+    results on that key.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    return " ".join("".join(" " if _is_query_separator(char) else char for char in text).split())
+
+def _read_parse_cache_file() -> List[Tuple[str, Dict[str, Any], float]]:
+    """Entries in PARSE_CACHE_PATH that have not expired yet."""
+    if not os.path.exists(PARSE_CACHE_PATH):
+        return []
+    with open(PARSE_CACHE_PATH, "r", encoding="utf-8") as f:
+        entries = json.load(f).get("entries", [])
+    now = time.time()
+    return [(key, value, stored_at) for key, value, stored_at in entries
+            if now - stored_at <= parse_cache.ttl]
+
+def _load_parse_cache() -> None:
+    """Load persisted parse results, skipping anything already expired."""
+    global _parse_cache_loaded
+    with _parse_cache_file_lock:
+        if _parse_cache_loaded:
+            return
+        _parse_cache_loaded = True
+        if not PARSE_CACHE_PATH:
+            return
+        try:
+            for key, value, stored_at in _read_parse_cache_file():
+                parse_cache.set(key, value, stored_at=stored_at)
+            print(f"Loaded {len(parse_cache)} cached query parses from {PARSE_CACHE_PATH}")
+        except Exception as e:
+            print(f"Error loading parse cache: {e}")
+
+@contextmanager
+def _parse_cache_file_locked() -> Iterator[None]:
+    """Hold an exclusive lock on PARSE_CACHE_PATH across processes (POSIX only)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(PARSE_CACHE_PATH + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _save_parse_cache() -> None:
+    """Schedule a write of the parse cache, so a burst of new parses costs one write."""
+    global _save_timer
+    if not PARSE_CACHE_PATH:
+        return
+    with _parse_cache_file_lock:
+        if _save_timer is None:
+            _save_timer = threading.Timer(PARSE_CACHE_SAVE_INTERVAL_SECONDS, flush_parse_cache)
+            _save_timer.daemon = True
+            _save_timer.start()
+
+def flush_parse_cache() -> None:
+    """Write pending parses now, merged with what other processes saved.
+    
+    Writers take a file lock for the read-merge-write, and each write goes
+    to a temp file of its own that is moved into place with an atomic
+    replace, so readers never see a partial file and entries saved by
+    another worker are kept.
+    """
+    global _save_timer
+    with _parse_cache_file_lock:
+        if _save_timer is None:
+            return
+        _save_timer.cancel()
+        _save_timer = None
+        tmp_path = None
+        try:
+            with _parse_cache_file_locked():
+                ours = {key: stored_at for key, _, stored_at in parse_cache.items()}
+                for key, value, stored_at in _read_parse_cache_file():
+                    if stored_at > ours.get(key, 0.0):
+                        parse_cache.set(key, value, stored_at=stored_at)
+                with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".tmp", delete=False,
+                                                 dir=os.path.dirname(os.path.abspath(PARSE_CACHE_PATH)),
+                                                 prefix=os.path.basename(PARSE_CACHE_PATH) + ".") as f:
+                    tmp_path = f.name
+                    json.dump({"entries": [list(item) for item in parse_cache.items()]}, f)
+                os.replace(tmp_path, PARSE_CACHE_PATH)
+        except Exception as e:
+            print(f"Error saving parse cache: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+# Parses still waiting for the timer are written on a normal exit
+atexit.register(flush_parse_cache)
+
+def _generate_parse(query: str) -> Dict[str, Any]:
+    """Ask Gemini for structured product details, raising on any failure."""
     prompt = f"""
     Extract product details from the following shopping query. Return ONLY valid JSON with these keys:
     - brand: string (product brand/manufacturer)
@@ -33,26 +176,79 @@ def parse_query_with_gemini(query: str) -> Dict[str, Any]:
     }}
     """
     
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        content = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        content = re.sub(r'```json\n?', '', content)
-        content = re.sub(r'```\n?', '', content)
-        
-        data = json.loads(content)
+    data = _generate_json(prompt)
+    
+    # Validate required fields
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a dictionary")
         
-        # Validate required fields
-        if not isinstance(data, dict):
-            raise ValueError("Response is not a dictionary")
-            
-        return data
+    return data
+
+def _generate_batch_parse(queries: List[str]) -> List[Dict[str, Any]]:
+    """Ask Gemini to parse several queries in one prompt, raising on any failure."""
+    numbered = "\n".join(f'    {i + 1}. "{query}"' for i, query in enumerate(queries))
+    prompt = f"""
+    Extract product details from each of the following shopping queries. Return ONLY a valid JSON
+    array with exactly {len(queries)} objects, one per query and in the same order. Each object has these keys:
+    - brand: string (product brand/manufacturer)
+    - model: string (specific model name/number)
+    - specs: string (key specifications like storage, color, size)
+    - category: string (product category like smartphone, laptop, headphones)
+    - keywords: array of strings (search keywords)
+    
+    Queries:
+{numbered}
+    
+    Example format for two queries:
+    [
+        {{"brand": "Apple", "model": "iPhone 16 Pro", "specs": "128GB", "category": "smartphone", "keywords": ["iPhone", "16", "Pro", "128GB", "Apple"]}},
+        {{"brand": "boAt", "model": "Airdopes 311 Pro", "specs": "", "category": "headphones", "keywords": ["boAt", "Airdopes", "311", "Pro"]}}
+    ]
+    """
+    
+    data = _generate_json(prompt)
+    
+    if not isinstance(data, list) or len(data) != len(queries):
+        raise ValueError(f"Expected a list of {len(queries)} results")
         
+    return data
+
+def _generate_json(prompt: str) -> Any:
+    """Run a prompt through Gemini and decode the JSON it returns."""
+    response = get_gemini_model().generate_content(prompt)
+    content = response.text.strip()
+    
+    # Remove markdown code blocks if present
+    content = re.sub(r'```json\n?', '', content)
+    content = re.sub(r'```\n?', '', content)
+    
+    return json.loads(content)
+
+def parse_query_with_gemini(query: str) -> Dict[str, Any]:
+    """Parse product query using Gemini AI to extract structured information."""
+    if not _parse_cache_loaded:
+        _load_parse_cache()
+    
+    key = canonicalize_query(query)
+    cached, state = parse_cache.get(key) if key else (None, None)
+    if state == FRESH:
+        print(f"Using cached parse for: {key}")
+        llm_parses.inc(result="cached")
+        return copy.deepcopy(cached)
+    
+    try:
+        data = _generate_parse(query)
     except Exception as e:
         print(f"Error parsing with Gemini: {e}")
+        llm_parses.inc(result="fallback_error")
         return fallback_parse(query)
+    
+    llm_parses.inc(result="gemini")
+    # Only successful LLM parses are cached so failures get retried
+    if key:
+        parse_cache.set(key, data)
+        _save_parse_cache()
+    return copy.deepcopy(data)
 
 def fallback_parse(query: str) -> Dict[str, Any]:
     """Fallback parser when Gemini API fails."""
@@ -123,8 +319,79 @@ def fallback_parse(query: str) -> Dict[str, Any]:
 
 def parse_query_with_llm(query: str) -> Dict[str, Any]:
     """Main parsing function that tries Gemini first, then falls back."""
-    if os.getenv("GOOGLE_API_KEY"):
-        return parse_query_with_gemini(query)
-    else:
+    start = time.monotonic()
+    try:
+        if os.getenv("GOOGLE_API_KEY"):
+            return parse_query_with_gemini(query)
+        else:
+            print("No Google API key found, using fallback parser")
+            llm_parses.inc(result="fallback_no_key")
+            return fallback_parse(query)
+    finally:
+        llm_parse_latency.observe(time.monotonic() - start, mode="single")
+
+def parse_queries_with_llm(queries: List[str]) -> List[Dict[str, Any]]:
+    """Parse many queries at once, using batched Gemini prompts for cache misses.
+    
+    Results are returned in input order. Any query whose batch fails, or whose
+    entry in the batch is malformed, is parsed with the fallback parser.
+    """
+    start = time.monotonic()
+    try:
+        return _parse_queries(queries)
+    finally:
+        llm_parse_latency.observe(time.monotonic() - start, mode="batch")
+
+def _parse_queries(queries: List[str]) -> List[Dict[str, Any]]:
+    if not os.getenv("GOOGLE_API_KEY"):
         print("No Google API key found, using fallback parser")
-        return fallback_parse(query)
+        llm_parses.inc(len(queries), result="fallback_no_key")
+        return [fallback_parse(query) for query in queries]
+    
+    if not _parse_cache_loaded:
+        _load_parse_cache()
+    
+    # Queries without a canonical key are keyed on their raw text and never cached
+    canonical = [canonicalize_query(query) for query in queries]
+    keys = [key or query for key, query in zip(canonical, queries)]
+    uncacheable = {query for key, query in zip(canonical, queries) if not key}
+    
+    parsed: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, str] = {}  # canonical key -> first query spelling seen
+    for query, key in zip(queries, keys):
+        if key in parsed or key in pending:
+            continue
+        cached, state = parse_cache.get(key) if key not in uncacheable else (None, None)
+        if state == FRESH:
+            parsed[key] = cached
+        else:
+            pending[key] = query
+    
+    print(f"Batch parse: {len(queries)} queries, {len(parsed)} cached, {len(pending)} to parse")
+    llm_parses.inc(len(parsed), result="cached")
+    
+    pending_items = list(pending.items())
+    stored = False
+    for start in range(0, len(pending_items), LLM_BATCH_SIZE):
+        chunk = pending_items[start:start + LLM_BATCH_SIZE]
+        try:
+            results = _generate_batch_parse([query for _, query in chunk])
+        except Exception as e:
+            print(f"Error batch parsing with Gemini: {e}")
+            results = [None] * len(chunk)
+        
+        for (key, query), data in zip(chunk, results):
+            if isinstance(data, dict):
+                if key not in uncacheable:
+                    parse_cache.set(key, data)
+                parsed[key] = data
+                stored = True
+                llm_parses.inc(result="gemini")
+            else:
+                parsed[key] = fallback_parse(query)
+                llm_parses.inc(result="fallback_error")
+    
+    if stored:
+        _save_parse_cache()
+    
+    return [copy.deepcopy(parsed[key]) for key in keys]
@@ -2,21 +2,76 @@
 
 import asyncio
 import os
-import re
-from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+import sys
+import time
+import json
+import heapq
+from itertools import chain
+from operator import attrgetter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, AsyncIterator, Union
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from app.llm_utils import parse_query_with_llm
+from app.llm_utils import canonicalize_query, parse_query_with_llm, parse_queries_with_llm
 from app.retailers import get_retailers_for_country, get_supported_countries, get_currency_for_country
 from app.mock_data import generate_mock_offers
+from app.models import Offer
+from app.browser_pool import browser_pool
+from app.cache import TTLCache, FRESH, STALE
+from app.deadline import Deadline, DeadlineExceeded, current_deadline
+from app.circuit_breaker import domain_breakers
+from app.rate_limiter import domain_rate_limiter
+from app.fetch_cache import fetch_cache
+from app.singleflight import SingleFlight
+from app.extract_pool import extraction_pool
+from app.retailer_stats import retailer_stats
+from app.admission import BulkheadFull, Overloaded, Reservation, retailer_bulkheads, scrape_capacity
+from app.degradation import CACHE_ONLY, FULL, DegradationPolicy, current_tier
+from app.tracing import TracingMiddleware, add_event, span, tracer
+from app.metrics import (
+    CONTENT_TYPE, compare_latency, compare_requests, comparison_results, metrics,
+    retailer_scrape_latency, retailer_scrapes
+)
 from fastapi.concurrency import run_in_threadpool
-import concurrent.futures
-from contextlib import asynccontextmanager
+from contextlib import ExitStack, asynccontextmanager, contextmanager
 from mangum import Mangum
 
+# Result cache configuration
+ENABLE_CACHING = os.getenv("ENABLE_CACHING", "true").lower() == "true"
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_STALE_SECONDS = int(os.getenv("CACHE_STALE_SECONDS", "600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+CACHE_STATUS_FRESH = "fresh"
+CACHE_STATUS_CACHED = "cached"
+CACHE_STATUS_STALE = "stale"
+
+# Batch comparison limits
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Time budget for a whole /compare/batch request, shared by all of its comparisons;
+# like COMPARE_BUDGET_SECONDS it stays under the 30s maxDuration in vercel.json
+BATCH_BUDGET_SECONDS = float(os.getenv("BATCH_BUDGET_SECONDS", "25"))
+
+# Time budgets: total per /compare request, cap per retailer, and time kept back for ranking
+COMPARE_BUDGET_SECONDS = float(os.getenv("COMPARE_BUDGET_SECONDS", "25"))
+RETAILER_BUDGET_SECONDS = float(os.getenv("RETAILER_BUDGET_SECONDS", "20"))
+RESPONSE_RESERVE_SECONDS = float(os.getenv("RESPONSE_RESERVE_SECONDS", "1"))
+
+# Cheapest offers returned per comparison
+MAX_RESULTS = int(os.getenv("MAX_RESULTS", "20"))
+
+# Lazy startup defers the scraper stack and browser launch to the first request that
+# needs them; "auto" turns it on under serverless runtimes (Lambda, Vercel)
+_LAZY_STARTUP = os.getenv("LAZY_STARTUP", "auto").lower()
+if _LAZY_STARTUP == "auto":
+    LAZY_STARTUP = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME") or os.getenv("VERCEL"))
+else:
+    LAZY_STARTUP = _LAZY_STARTUP == "true"
+
 # Set the asyncio event loop policy immediately for Windows
 if os.name == 'nt':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
@@ -26,9 +81,24 @@ async def lifespan(app: FastAPI):
     # Startup
     print("Starting Universal Price Comparison Tool...")
     print(f"Supported countries: {get_supported_countries()}")
+    if LAZY_STARTUP:
+        print("Lazy startup: scrapers and browsers load on first use")
+    else:
+        # Long-running servers pay the imports and browser launch before the first request
+        from app import scraper  # noqa: F401
+        try:
+            await browser_pool.start()
+        except Exception as e:
+            # The pool starts lazily on first use if the browsers are not ready yet
+            print(f"Could not start browser pool: {e}")
     yield
     # Shutdown
     print("Shutting down...")
+    await browser_pool.stop()
+    if "app.scraper" in sys.modules:
+        await sys.modules["app.scraper"].close_http_client()
+    if extraction_pool is not None:
+        extraction_pool.shutdown()
 
 app = FastAPI(
     title="Universal Price Comparison Tool",
@@ -46,7 +116,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Outermost, so each trace covers the whole request
+app.add_middleware(TracingMiddleware)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed load with a fast 503 rather than queueing behind a full scraper."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -61,6 +143,40 @@ class PriceComparisonResponse(BaseModel):
     query: str
     supported_retailers: List[str]
     note: Optional[str] = None
+    cache_status: Optional[str] = None  # fresh, cached or stale
+    service_tier: Optional[str] = None  # full, no_render, priority_only or cache_only
+
+class BatchQueryInput(BaseModel):
+    items: List[QueryInput]
+
+class BatchItemResult(BaseModel):
+    country: str
+    query: str
+    result: Optional[PriceComparisonResponse] = None
+    error: Optional[str] = None
+
+class BatchComparisonResponse(BaseModel):
+    results: List[BatchItemResult]
+    total_items: int
+    unique_comparisons: int
+
+# Final comparison payloads keyed on country and parsed product
+result_cache = TTLCache(
+    ttl=CACHE_TTL_SECONDS,
+    stale_ttl=CACHE_STALE_SECONDS,
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    sizeof=lambda response: len(response.model_dump_json())
+)
+_refreshing_keys = set()
+_background_tasks = set()
+
+# In-flight work shared by concurrent identical requests
+compare_flight = SingleFlight("comparison")
+retailer_flight = SingleFlight("retailer scrape")
+
+# Load-aware service tiers, driven by the shared scrape queue
+degradation = DegradationPolicy(scrape_capacity)
 
 @app.get("/", response_class=FileResponse)
 async def serve_frontend():
@@ -70,146 +186,571 @@ async def serve_frontend():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "supported_countries": get_supported_countries()}
+    # The fetch cache counts its entries in SQLite, which can wait on a writer's lock
+    fetch_cache_stats = await asyncio.to_thread(fetch_cache.stats) if fetch_cache is not None else None
+    return {
+        "status": "healthy",
+        "supported_countries": get_supported_countries(),
+        "browser_pool": browser_pool.stats(),
+        "result_cache": result_cache.stats(),
+        "circuit_breakers": domain_breakers.states(),
+        "rate_limits": domain_rate_limiter.stats(),
+        "fetch_cache": fetch_cache_stats,
+        "single_flight": {"comparisons": compare_flight.stats(), "retailers": retailer_flight.stats()},
+        "retailer_stats": retailer_stats.states(),
+        "scrape_capacity": scrape_capacity.stats(),
+        "retailer_bulkheads": retailer_bulkheads.states(),
+        "degradation": degradation.stats(),
+        "tracing": tracer.stats(),
+        "extraction_pool": extraction_pool.stats() if extraction_pool is not None else None
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Counters and latency histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
 
 @app.get("/countries")
 async def get_countries():
     """Get list of supported countries."""
     return {"countries": get_supported_countries()}
 
+async def _scrape_retailer(retailer: Dict[str, Any], product_info: Dict[str, Any],
+                           deadline: Deadline) -> Optional[List[Offer]]:
+    """Run a single retailer scraper within its share of the request budget.
+    
+    Returns no offers on error or when the budget runs out, and None when the
+    scrape was shed for lack of capacity. The budget is cut to a multiple of
+    the retailer's observed p95 once it has enough history.
+    """
+    from app.scraper import build_search_query
+    retailer_deadline = deadline.child(retailer_stats.get(retailer["name"]).timeout(RETAILER_BUDGET_SECONDS))
+    # Visible to make_request for this task only, so retries stop at the budget
+    current_deadline.set(retailer_deadline)
+    # Concurrent comparisons sending the same search to a retailer share one scrape
+    flight_key = (retailer["name"], product_info.get('country'), build_search_query(product_info))
+    outcome = "cancelled"
+    with span("retailer", retailer=retailer["name"], budget_seconds=round(retailer_deadline.budget, 3)) as retailer_span:
+        try:
+            offers = await asyncio.wait_for(
+                retailer_flight.do(flight_key, lambda: _timed_scrape(retailer, product_info)),
+                timeout=retailer_deadline.remaining()
+            )
+            print(f"Offers from {retailer['name']}: {len(offers)} found")
+            outcome = "ok" if offers else "empty"
+            retailer_span.set(outcome=outcome, offers=len(offers))
+            return offers
+        except asyncio.TimeoutError:
+            print(f"Budget of {retailer_deadline.budget:.1f}s exhausted for {retailer['name']}")
+            outcome = "timeout"
+            retailer_span.set(outcome=outcome)
+            return []
+        except (BulkheadFull, Overloaded) as e:
+            print(f"Skipping {retailer['name']}: {e}")
+            outcome = "shed"
+            retailer_span.set(outcome=outcome)
+            return None
+        except Exception as e:
+            print(f"Error scraping {retailer['name']}: {e}")
+            outcome = "error"
+            retailer_span.set(outcome=outcome, error=str(e))
+            return []
+        finally:
+            retailer_scrapes.inc(retailer=retailer["name"], outcome=outcome)
+
+async def _timed_scrape(retailer: Dict[str, Any], product_info: Dict[str, Any]) -> List[Offer]:
+    """Run a retailer's scraper once in a shared scrape slot and record its latency and yield.
+    
+    The retailer's bulkhead is checked first, so a slow site over its cap
+    fails fast instead of taking more of the shared slots.
+    """
+    stats = retailer_stats.get(retailer["name"])
+    with retailer_bulkheads.get(retailer).enter():
+        async with scrape_capacity.slot():
+            add_event("scrape_slot_acquired")
+            start = time.monotonic()
+            try:
+                offers = await retailer["scrape_func"](product_info)
+            except BaseException:
+                # Scrapes cut off by their timeout arrive here as CancelledError; they
+                # must count too, or a slowing retailer's p95 would never catch up
+                stats.record(time.monotonic() - start, False, 0)
+                raise
+            finally:
+                retailer_scrape_latency.observe(time.monotonic() - start, retailer=retailer["name"])
+            stats.record(time.monotonic() - start, True, len(offers))
+    return offers
+
+def _admit_live(tier: str, retailers: List[Dict[str, Any]]) -> Reservation:
+    """Let a comparison scrape ``retailers`` live at ``tier``, or raise Overloaded."""
+    if tier == CACHE_ONLY:
+        raise Overloaded(scrape_capacity.retry_after())
+    return scrape_capacity.admit(len(retailers))
+
+def _all_shed(results: List[Optional[List[Offer]]]) -> bool:
+    """Whether every retailer of a comparison was shed, so it has nothing real to show."""
+    return bool(results) and all(offers is None for offers in results)
+
+def _live_retailers(tier: str, retailers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Retailers to scrape at ``tier``, highest-yield first, without those that keep finding nothing."""
+    return retailer_stats.schedule(degradation.retailers_for(tier, retailers))
+
+async def _run_comparison(product_info: Dict[str, Any], retailers: List[Dict[str, Any]],
+                          input: QueryInput, deadline: Optional[Deadline] = None,
+                          tier: Optional[str] = None) -> PriceComparisonResponse:
+    """Scrape all retailers live and build the ranked response.
+    
+    Raises Overloaded when the shared scrape queue has no room for this
+    comparison's retailers, when every one of its scrapes was shed, or when
+    the service is down to cached results.
+    """
+    if tier is None:
+        tier = degradation.tier()
+    live_retailers = _live_retailers(tier, retailers)
+    with _admit_live(tier, live_retailers):
+        # Visible to the scrapers started below, which skip browser rendering when degraded
+        current_tier.set(tier)
+        if deadline is None:
+            deadline = Deadline(COMPARE_BUDGET_SECONDS)
+        scrape_deadline = deadline.child(reserve=RESPONSE_RESERVE_SECONDS)
+        
+        # Scrape prices from all retailers concurrently
+        results = await asyncio.gather(
+            *(_scrape_retailer(retailer, product_info, scrape_deadline) for retailer in live_retailers)
+        )
+    if _all_shed(results):
+        # Demo data would hide the overload behind a 200
+        raise Overloaded(scrape_capacity.retry_after())
+    results = [offers or [] for offers in results]
+    print(f"Total offers found: {sum(len(offers) for offers in results)}")
+    
+    # Validation and ranking stream over the per-retailer lists without merging them
+    valid_offers = _validate_offers(chain.from_iterable(results), product_info['country'])
+    return _build_response(valid_offers, product_info, retailers, input, tier)
+
+def _mock_offers(product_info: Dict[str, Any]) -> List[Offer]:
+    """Demo offers for when scraping finds nothing, flagged as mock data."""
+    offers = (Offer.from_dict(offer, product_info['country'], is_mock=True)
+              for offer in generate_mock_offers(product_info))
+    return [offer for offer in offers if offer is not None]
+
+def _validate_offers(offers: Iterable[Union[Offer, Dict[str, Any]]], country: str) -> List[Offer]:
+    """Keep offers with a positive price; plain dicts are parsed into Offer records once."""
+    valid_offers = []
+    for offer in offers:
+        if not isinstance(offer, Offer):
+            offer = Offer.from_dict(offer, country)
+        if offer is not None and offer.price_numeric > 0:
+            valid_offers.append(offer)
+        else:
+            print(f"Skipping invalid offer: {offer}")
+    return valid_offers
+
+def _build_response(valid_offers: List[Offer], product_info: Dict[str, Any],
+                    retailers: List[Dict[str, Any]], input: QueryInput,
+                    tier: str = FULL) -> PriceComparisonResponse:
+    """Rank validated offers into the final response, falling back to mock data."""
+    print(f"Valid offers after filtering: {len(valid_offers)}")
+    
+    source = "live"
+    with span("rank", offers=len(valid_offers)) as rank:
+        # If no valid offers, use mock data for demonstration
+        if len(valid_offers) == 0:
+            print("No valid offers found, generating mock data for demonstration...")
+            valid_offers = _mock_offers(product_info)
+            print(f"Added {len(valid_offers)} mock offers")
+            source = "mock"
+            rank.set(mock=True)
+        
+        # Cheapest first; a bounded heap instead of sorting every offer
+        final_offers = heapq.nsmallest(MAX_RESULTS, valid_offers, key=attrgetter("price_numeric"))
+    
+    print(f"Returning {len(final_offers)} valid offers")
+    comparison_results.inc(country=product_info['country'], source=source)
+    
+    # Add note about mock data if used
+    note = None
+    if any(offer.is_mock for offer in final_offers):
+        note = "Demo data shown - real scraping capabilities available"
+    
+    return PriceComparisonResponse(
+        results=[offer.to_dict() for offer in final_offers],
+        total_results=len(final_offers),
+        country=input.country,
+        query=input.query,
+        supported_retailers=[retailer["name"] for retailer in retailers],
+        note=note,
+        cache_status=CACHE_STATUS_FRESH,
+        service_tier=tier
+    )
+
+def _result_cache_key(country: str, product_info: Dict[str, Any]) -> str:
+    """Cache key for a comparison: normalized country plus the parsed product."""
+    return f"{country.upper()}|{json.dumps(product_info, sort_keys=True, default=str)}"
+
+def _cached_state(product_info: Dict[str, Any], tier: str) -> Optional[str]:
+    """Whether a comparison can be answered from the result cache (FRESH or STALE)."""
+    if not ENABLE_CACHING:
+        return None
+    _, state = _cache_lookup(_result_cache_key(product_info['country'], product_info), tier)
+    return state
+
+def _from_cache(response: PriceComparisonResponse, input: QueryInput, status: str,
+                tier: Optional[str] = None) -> PriceComparisonResponse:
+    """Re-stamp a cached response for the current request."""
+    update = {"country": input.country, "query": input.query, "cache_status": status}
+    if tier is not None:
+        update["service_tier"] = tier
+    return response.model_copy(update=update)
+
+def _cache_lookup(cache_key: str, tier: str):
+    """Result cache lookup at ``tier``: ``(response, state)`` as from TTLCache.get.
+    
+    A result scraped at a degraded tier covers fewer retailers, so once the
+    service is back at full tier it is served as stale and refreshed.
+    """
+    cached, state = result_cache.get(cache_key)
+    if state == FRESH and tier == FULL and cached.service_tier not in (None, FULL):
+        state = STALE
+    return cached, state
+
+def _store_result(key: str, response: PriceComparisonResponse) -> None:
+    # Demo data stands in for failed scrapes and should not outlive them
+    if response.note is None:
+        result_cache.set(key, response)
+
+async def _refresh_result(key: str, product_info: Dict[str, Any], retailers: List[Dict[str, Any]],
+                          input: QueryInput) -> None:
+    """Background revalidation of a stale cache entry, traced on its own."""
+    try:
+        with tracer.trace("refresh", country=input.country, query=input.query):
+            response = await _run_comparison(product_info, retailers, input)
+        _store_result(key, response)
+        print(f"Refreshed cached comparison for {input.country}: {input.query}")
+    except Exception as e:
+        print(f"Error refreshing cached comparison: {e}")
+    finally:
+        _refreshing_keys.discard(key)
+
+def _schedule_refresh(key: str, product_info: Dict[str, Any], retailers: List[Dict[str, Any]],
+                      input: QueryInput) -> None:
+    if key in _refreshing_keys:
+        return
+    _refreshing_keys.add(key)
+    task = asyncio.create_task(_refresh_result(key, product_info, retailers, input))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _compare_with_cache(product_info: Dict[str, Any], retailers: List[Dict[str, Any]],
+                              input: QueryInput, deadline: Optional[Deadline] = None) -> PriceComparisonResponse:
+    """Serve a comparison from the result cache when possible, else scrape live."""
+    cache_key = _result_cache_key(product_info['country'], product_info)
+    tier = degradation.tier()
+    if ENABLE_CACHING:
+        cached, state = _cache_lookup(cache_key, tier)
+        if state == FRESH:
+            print("Serving cached comparison")
+            return _from_cache(cached, input, CACHE_STATUS_CACHED, tier)
+        if state == STALE:
+            if tier == CACHE_ONLY:
+                print("Serving stale comparison, too loaded to refresh")
+            else:
+                print("Serving stale comparison, refreshing in background")
+                _schedule_refresh(cache_key, product_info, retailers, input)
+            return _from_cache(cached, input, CACHE_STATUS_STALE, tier)
+    
+    response = await _run_comparison(product_info, retailers, input, deadline, tier)
+    if ENABLE_CACHING:
+        _store_result(cache_key, response)
+    return response
+
+async def _compare(input: QueryInput, deadline: Deadline) -> PriceComparisonResponse:
+    """Parse the query, pick the country's retailers and run the comparison."""
+    # Parse query using LLM (blocking client, keep it off the event loop)
+    with span("llm.parse"):
+        product_info = await run_in_threadpool(parse_query_with_llm, input.query)
+    product_info['country'] = input.country.upper()
+    
+    print(f"Parsed product info: {product_info}")
+    
+    # Get retailers for the country
+    retailers = get_retailers_for_country(input.country)
+    print(f"Found {len(retailers)} retailers for {input.country}")
+    
+    if not retailers:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No retailers found for country '{input.country}'"
+        )
+    # Leave out retailers whose circuit is open; if all are, they fail fast anyway
+    retailers = get_retailers_for_country(input.country, skip_open_circuits=True) or retailers
+    
+    return await _compare_with_cache(product_info, retailers, input, deadline)
+
+@contextmanager
+def _observe_request(endpoint: str, country: str) -> Iterator[None]:
+    """Count a comparison request and its latency by endpoint, country and HTTP status.
+    
+    A batch spanning several countries is labelled "mixed".
+    """
+    # Only supported countries become label values, so clients cannot grow the series
+    if country != "mixed":
+        country = country.upper() if country.upper() in get_supported_countries() else "other"
+    start = time.monotonic()
+    status = 500
+    try:
+        yield
+        status = 200
+    except HTTPException as e:
+        status = e.status_code
+        raise
+    except Overloaded:
+        status = 503
+        raise
+    finally:
+        compare_requests.inc(endpoint=endpoint, country=country, status=status)
+        compare_latency.observe(time.monotonic() - start, endpoint=endpoint, country=country)
+
 @app.post("/compare", response_model=PriceComparisonResponse)
 async def compare_prices(input: QueryInput):
     """Main endpoint to compare prices across multiple retailers."""
+    with _observe_request("compare", input.country):
+        try:
+            deadline = Deadline(COMPARE_BUDGET_SECONDS)
+            print(f"Received request - Country: {input.country}, Query: {input.query}")
+            
+            # Validate country
+            if input.country.upper() not in get_supported_countries():
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Country '{input.country}' is not supported. Supported countries: {get_supported_countries()}"
+                )
+            
+            # Identical concurrent requests share one parse and retailer fan-out;
+            # a query with nothing left after canonicalizing is never coalesced
+            canonical_query = canonicalize_query(input.query)
+            if canonical_query:
+                flight_key = (input.country.upper(), canonical_query)
+                response = await compare_flight.do(flight_key, lambda: _compare(input, deadline))
+            else:
+                response = await _compare(input, deadline)
+            return response.model_copy(update={"country": input.country, "query": input.query})
+            
+        except (HTTPException, Overloaded):
+            raise
+        except Exception as e:
+            print(f"Unexpected error in compare_prices: {e}")
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def _format_frame(event: str, data: Dict[str, Any], stream_format: str) -> str:
+    """Encode one stream frame as NDJSON or a Server-Sent Event."""
+    payload = json.dumps({"type": event, **data}, default=str)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+async def _stream_comparison(product_info: Dict[str, Any], retailers: List[Dict[str, Any]],
+                             input: QueryInput, stream_format: str, deadline: Deadline, tier: str,
+                             live_retailers: Optional[List[Dict[str, Any]]] = None,
+                             reservation: Optional[Reservation] = None) -> AsyncIterator[str]:
+    """Yield each retailer's validated offers as it finishes, then a summary frame.
+    
+    ``live_retailers`` are the retailers ``reservation`` was admitted for;
+    the reservation is released when the stream ends. When the stream turns
+    out to be overloaded after all, an error frame with a Retry-After hint
+    takes the place of the summary.
+    """
     try:
-        print(f"Received request - Country: {input.country}, Query: {input.query}")
+        cache_key = _result_cache_key(product_info['country'], product_info)
+        if ENABLE_CACHING:
+            cached, state = _cache_lookup(cache_key, tier)
+            if state in (FRESH, STALE):
+                status = CACHE_STATUS_CACHED if state == FRESH else CACHE_STATUS_STALE
+                if state == STALE and tier != CACHE_ONLY:
+                    _schedule_refresh(cache_key, product_info, retailers, input)
+                yield _format_frame("summary", _from_cache(cached, input, status, tier).model_dump(), stream_format)
+                return
+        
+        if reservation is None:
+            # The cached entry expired after the request was let in
+            live_retailers = _live_retailers(tier, retailers)
+            reservation = _admit_live(tier, live_retailers)
+        current_tier.set(tier)
+        found = 0
+        shed = 0
+        valid_offers = []
+        scrape_deadline = deadline.child(reserve=RESPONSE_RESERVE_SECONDS)
+        tasks = {
+            asyncio.create_task(_scrape_retailer(retailer, product_info, scrape_deadline)): retailer
+            for retailer in live_retailers
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    offers = task.result()
+                    if offers is None:
+                        shed += 1
+                        offers = []
+                    found += len(offers)
+                    valid = _validate_offers(offers, product_info['country'])
+                    valid_offers.extend(valid)
+                    yield _format_frame("offers", {
+                        "retailer": tasks[task]["name"],
+                        "offers": [offer.to_dict() for offer in valid]
+                    }, stream_format)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if tasks and shed == len(tasks):
+            raise Overloaded(scrape_capacity.retry_after())
         
-        # Validate country
+        print(f"Total offers found: {found}")
+        response = _build_response(valid_offers, product_info, retailers, input, tier)
+        if ENABLE_CACHING:
+            _store_result(cache_key, response)
+        yield _format_frame("summary", response.model_dump(), stream_format)
+    except Overloaded as e:
+        # The 200 is already sent, so the overload is reported in-stream
+        print(f"Streaming comparison overloaded: {e}")
+        yield _format_frame("error", {"status": 503, "detail": str(e), "retry_after": e.retry_after},
+                            stream_format)
+    finally:
+        if reservation is not None:
+            reservation.release()
+
+async def _observed_stream(frames: AsyncIterator[str], observation: ExitStack) -> AsyncIterator[str]:
+    """Pass stream frames through, closing the request's metrics observation when the stream ends."""
+    with observation:
+        async for frame in frames:
+            yield frame
+
+@app.post("/compare/stream")
+async def compare_prices_stream(input: QueryInput, format: str = "ndjson"):
+    """Streaming variant of /compare that emits offers as each retailer completes.
+    
+    Use ?format=sse for Server-Sent Events; the default is newline-delimited JSON.
+    """
+    with ExitStack() as stack:
+        # Until the stream is handed over, errors are observed with their status
+        stack.enter_context(_observe_request("compare_stream", input.country))
+        if format not in ("ndjson", "sse"):
+            raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+        deadline = Deadline(COMPARE_BUDGET_SECONDS)
+        print(f"Received streaming request - Country: {input.country}, Query: {input.query}")
+    
         if input.country.upper() not in get_supported_countries():
             raise HTTPException(
                 status_code=400, 
                 detail=f"Country '{input.country}' is not supported. Supported countries: {get_supported_countries()}"
             )
-        
-        # Parse query using LLM
-        product_info = parse_query_with_llm(input.query)
+    
+        with span("llm.parse"):
+            product_info = await run_in_threadpool(parse_query_with_llm, input.query)
         product_info['country'] = input.country.upper()
-        
-        print(f"Parsed product info: {product_info}")
-        
-        # Get retailers for the country
+    
         retailers = get_retailers_for_country(input.country)
-        print(f"Found {len(retailers)} retailers for {input.country}")
-        
         if not retailers:
             raise HTTPException(
                 status_code=404,
                 detail=f"No retailers found for country '{input.country}'"
             )
-        
-        # Scrape prices from all retailers concurrently
-        all_offers = []
-        
-        # Use ThreadPoolExecutor for concurrent scraping
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # Submit all scraping tasks
-            future_to_retailer = {
-                executor.submit(retailer["scrape_func"], product_info): retailer
-                for retailer in retailers
-            }
-            
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_retailer):
-                retailer = future_to_retailer[future]
-                try:
-                    offers = future.result(timeout=60)  # 60 second timeout per retailer
-                    print(f"Offers from {retailer['name']}: {len(offers)} found")
-                    all_offers.extend(offers)
-                except Exception as e:
-                    print(f"Error scraping {retailer['name']}: {e}")
-                    continue
-        
-        print(f"Total offers found: {len(all_offers)}")
-        
-        # If no real results, use mock data for demonstration
-        if len(all_offers) == 0:
-            print("No real results found, generating mock data for demonstration...")
-            mock_offers = generate_mock_offers(product_info)
-            all_offers.extend(mock_offers)
-            print(f"Added {len(mock_offers)} mock offers")
-        
-        # Filter out invalid offers and clean prices
-        valid_offers = []
-        for offer in all_offers:
-            try:
-                # Ensure price is a string and clean it
-                price_str = str(offer.get("price", ""))
-                price_clean = re.sub(r'[^\d.]', '', price_str)
-                
-                if price_clean and float(price_clean) > 0:
-                    offer["price"] = price_clean
-                    offer["price_numeric"] = float(price_clean)
-                    valid_offers.append(offer)
+        retailers = get_retailers_for_country(input.country, skip_open_circuits=True) or retailers
+        # Turn the request away before streaming starts if it cannot be served
+        tier = degradation.tier()
+        live_retailers = None
+        reservation = None
+        if _cached_state(product_info, tier) not in (FRESH, STALE):
+            # Reserve exactly the retailers the stream will scrape
+            live_retailers = _live_retailers(tier, retailers)
+            reservation = _admit_live(tier, live_retailers)
+        # From here the observation ends with the stream, so it covers its full duration
+        observation = stack.pop_all()
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _observed_stream(_stream_comparison(product_info, retailers, input, format, deadline, tier,
+                                            live_retailers, reservation),
+                         observation),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/compare/batch", response_model=BatchComparisonResponse)
+async def compare_prices_batch(input: BatchQueryInput):
+    """Compare prices for many queries, parsing them in batches and sharing scrapes."""
+    countries = {item.country.upper() for item in input.items}
+    with _observe_request("compare_batch", countries.pop() if len(countries) == 1 else "mixed"):
+        if len(input.items) > MAX_BATCH_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch too large: {len(input.items)} items (maximum {MAX_BATCH_ITEMS})"
+            )
+    
+        try:
+            deadline = Deadline(BATCH_BUDGET_SECONDS)
+            print(f"Received batch request with {len(input.items)} items")
+            supported = get_supported_countries()
+            items = [BatchItemResult(country=item.country, query=item.query) for item in input.items]
+            valid_indices = []
+            for index, item in enumerate(input.items):
+                if item.country.upper() not in supported:
+                    items[index].error = f"Country '{item.country}' is not supported"
                 else:
-                    print(f"Skipping invalid offer: {offer}")
-            except (ValueError, TypeError) as e:
-                print(f"Error processing offer {offer}: {e}")
-                continue
-        
-        print(f"Valid offers after filtering: {len(valid_offers)}")
+                    valid_indices.append(index)
         
-        # If still no valid offers after filtering, try mock data again
-        if len(valid_offers) == 0:
-            print("No valid offers after filtering, generating mock data...")
-            mock_offers = generate_mock_offers(product_info)
-            for offer in mock_offers:
-                try:
-                    price_str = str(offer.get("price", ""))
-                    price_clean = re.sub(r'[^\d.]', '', price_str)
-                    
-                    if price_clean and float(price_clean) > 0:
-                        offer["price"] = price_clean
-                        offer["price_numeric"] = float(price_clean)
-                        valid_offers.append(offer)
-                except (ValueError, TypeError) as e:
-                    print(f"Error processing mock offer {offer}: {e}")
-                    continue
-            print(f"Added {len(valid_offers)} mock offers to valid offers")
-        
-        # Sort offers by price (ascending)
-        try:
-            sorted_offers = sorted(valid_offers, key=lambda x: x.get("price_numeric", float('inf')))
-        except Exception as e:
-            print(f"Error sorting offers: {e}")
-            sorted_offers = valid_offers
+            # Parse all queries with a handful of batched LLM calls
+            with span("llm.parse", queries=len(valid_indices)):
+                parsed = await run_in_threadpool(
+                    parse_queries_with_llm, [input.items[index].query for index in valid_indices]
+                )
         
-        # Remove the numeric price field from final results
-        for offer in sorted_offers:
-            offer.pop("price_numeric", None)
+            # Group items that resolve to the same comparison so each is scraped once
+            groups: Dict[str, List[int]] = {}
+            group_products: Dict[str, Dict[str, Any]] = {}
+            for index, product_info in zip(valid_indices, parsed):
+                product_info['country'] = input.items[index].country.upper()
+                key = _result_cache_key(product_info['country'], product_info)
+                groups.setdefault(key, []).append(index)
+                group_products.setdefault(key, product_info)
         
-        # Limit results to top 20
-        final_offers = sorted_offers[:20]
+            print(f"Batch resolved to {len(groups)} unique comparisons")
+            semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
         
-        print(f"Returning {len(final_offers)} valid offers")
+            async def run_group(key: str) -> None:
+                indices = groups[key]
+                first = input.items[indices[0]]
+                product_info = group_products[key]
+                async with semaphore:
+                    try:
+                        if deadline.remaining() <= RESPONSE_RESERVE_SECONDS:
+                            raise DeadlineExceeded("Batch time budget exhausted before this query could run")
+                        retailers = get_retailers_for_country(first.country)
+                        if not retailers:
+                            raise ValueError(f"No retailers found for country '{first.country}'")
+                        retailers = get_retailers_for_country(first.country, skip_open_circuits=True) or retailers
+                        response = await _compare_with_cache(product_info, retailers, first, deadline)
+                    except Exception as e:
+                        print(f"Error in batch comparison for {first.query}: {e}")
+                        for index in indices:
+                            items[index].error = str(e)
+                        return
+                for index in indices:
+                    items[index].result = _from_cache(response, input.items[index], response.cache_status)
         
-        # Add note about mock data if used
-        note = None
-        if len(all_offers) > 0 and any('mock' in str(offer) for offer in all_offers):
-            note = "Demo data shown - real scraping capabilities available"
+            await asyncio.gather(*(run_group(key) for key in groups))
         
-        return PriceComparisonResponse(
-            results=final_offers,
-            total_results=len(final_offers),
-            country=input.country,
-            query=input.query,
-            supported_retailers=[retailer["name"] for retailer in retailers],
-            note=note
-        )
+            return BatchComparisonResponse(
+                results=items,
+                total_items=len(items),
+                unique_comparisons=len(groups)
+            )
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Unexpected error in compare_prices: {e}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        except Exception as e:
+            print(f"Unexpected error in compare_prices_batch: {e}")
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.get("/test")
 async def test_endpoint():
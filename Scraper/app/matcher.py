@@ -0,0 +1,102 @@
+# app/matcher.py
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+from rapidfuzz import fuzz, process
+
+DEFAULT_THRESHOLD = 60
+
+_MODEL_PUNCTUATION = re.compile(r'[,.]')
+_CAPACITY = re.compile(r'(\d+)\s*(gb|tb)')
+
+class MatchResult(NamedTuple):
+    score: int
+    keep: bool
+    reason: str
+
+class QueryMatcher:
+    """Matches candidate product names against one parsed query.
+
+    Everything derived from the query (lowercased brand, significant model
+    words, capacity, fuzzy query text) is computed once, so scoring a page of
+    candidates only does per-name work.
+    """
+
+    __slots__ = ("brand", "model", "model_words", "min_model_words", "capacity", "query_text", "threshold")
+
+    def __init__(self, product_info: Dict[str, Any], threshold: int = DEFAULT_THRESHOLD):
+        self.brand = (product_info.get('brand') or '').lower()
+        self.model = (product_info.get('model') or '').lower()
+        specs = (product_info.get('specs') or '').lower()
+
+        model_words = _MODEL_PUNCTUATION.sub('', self.model).split()
+        self.model_words: Tuple[str, ...] = tuple(
+            word for word in model_words if len(word) > 2 or word.isdigit()
+        )
+        # At least 50% of the significant model words must appear in the name
+        self.min_model_words = len(self.model_words) * 0.5
+
+        capacity_match = _CAPACITY.search(specs) if ('gb' in specs or 'tb' in specs) else None
+        self.capacity = capacity_match.group(1) if capacity_match else ""
+
+        self.query_text = f"{self.brand} {self.model} {specs}".strip()
+        self.threshold = threshold
+
+    def _prefilter(self, name: str) -> str:
+        """Reason a lowercased name fails the brand/model checks, or "" if it passes."""
+        if self.brand and self.brand not in name:
+            return f"brand '{self.brand}' missing"
+        if self.model_words:
+            matches = sum(1 for word in self.model_words if word in name)
+            if matches < self.min_model_words:
+                return f"model words {matches}/{len(self.model_words)}"
+        return ""
+
+    def score_batch(self, names: Sequence[str]) -> List[MatchResult]:
+        """Score every candidate name, in order, with one fuzzy-matching call."""
+        results: List[MatchResult] = [MatchResult(0, False, "empty name")] * len(names)
+        candidates: List[str] = []
+        positions: List[int] = []
+        for index, name in enumerate(names):
+            if not name:
+                continue
+            name_lower = name.lower()
+            rejected = self._prefilter(name_lower)
+            if rejected:
+                results[index] = MatchResult(0, False, rejected)
+            else:
+                candidates.append(name_lower)
+                positions.append(index)
+
+        if not candidates:
+            return results
+
+        # rapidfuzz scores the whole list in C; round to match fuzzywuzzy's integer scores
+        for _, score, candidate_index in process.extract(
+            self.query_text, candidates, scorer=fuzz.partial_ratio, limit=None
+        ):
+            score = int(round(score))
+            keep = score >= self.threshold
+            reason = "match" if keep else f"similarity {score} < {self.threshold}"
+            if keep and self.capacity and self.capacity not in candidates[candidate_index]:
+                # Capacity is often written differently, so it only annotates the match
+                reason = f"match, capacity {self.capacity} not in name"
+            results[positions[candidate_index]] = MatchResult(score, keep, reason)
+        return results
+
+    def match(self, name: str) -> MatchResult:
+        return self.score_batch([name])[0]
+
+@lru_cache(maxsize=256)
+def _cached_matcher(brand: str, model: str, specs: str, threshold: int) -> QueryMatcher:
+    return QueryMatcher({'brand': brand, 'model': model, 'specs': specs}, threshold)
+
+def get_matcher(product_info: Dict[str, Any], threshold: int = DEFAULT_THRESHOLD) -> QueryMatcher:
+    """Shared matcher for a parsed query, reused across retailers and requests."""
+    return _cached_matcher(
+        product_info.get('brand') or '',
+        product_info.get('model') or '',
+        product_info.get('specs') or '',
+        threshold,
+    )
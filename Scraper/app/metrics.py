@@ -0,0 +1,171 @@
+# app/metrics.py
+
+import bisect
+import threading
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Latency buckets in seconds, from a cached parse to a retailer's full budget
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _Metric:
+    """A metric family: one series per combination of label values."""
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def lines(self) -> Iterator[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonic total, e.g. responses seen."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def lines(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}"
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, plus their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: per-bucket counts (the last one past every bound), then sum and count
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: Any) -> int:
+        series = self._values.get(self._key(labels))
+        return int(series[-1]) if series else 0
+
+    def lines(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted((key, list(series)) for key, series in self._values.items())
+        names = self.labelnames + ("le",)
+        for key, series in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_label_text(names, key + (_format_value(bound),))} {cumulative}"
+            labels = _label_text(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series[-2])}"
+            yield f"{self.name}_count{labels} {int(series[-1])}"
+
+class MetricsRegistry:
+    """Every metric family the process exposes, rendered for a Prometheus scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# Comparison requests
+compare_requests = metrics.counter(
+    "compare_requests_total", "Comparison requests by endpoint, country and HTTP status.",
+    ("endpoint", "country", "status"))
+compare_latency = metrics.histogram(
+    "compare_request_duration_seconds", "Comparison request latency by endpoint and country, streams until their last frame.",
+    ("endpoint", "country"))
+comparison_results = metrics.counter(
+    "comparison_results_total", "Comparisons built from live offers or the mock-data fallback.",
+    ("country", "source"))
+
+# Retailers
+retailer_scrapes = metrics.counter(
+    "retailer_scrapes_total", "Retailer scrapes per comparison by outcome (ok, empty, timeout, shed, error).",
+    ("retailer", "outcome"))
+retailer_scrape_latency = metrics.histogram(
+    "retailer_scrape_duration_seconds", "Time a retailer scraper ran, fetch and extraction included.",
+    ("retailer",))
+retailer_funnel = metrics.counter(
+    "retailer_funnel_total", "Product cards per extraction stage: products, with_name, with_price, rejected, kept.",
+    ("retailer", "stage"))
+fetch_latency = metrics.histogram(
+    "retailer_fetch_duration_seconds", "Retailer page fetch latency, retries and cache included.",
+    ("domain",))
+fetch_responses = metrics.counter(
+    "retailer_http_responses_total", "Retailer HTTP responses by status code; transport failures as 'error'.",
+    ("domain", "status"))
+fetch_retries = metrics.counter(
+    "retailer_fetch_retries_total", "Retailer fetch attempts that were retried.",
+    ("domain",))
+
+# Query parsing
+llm_parse_latency = metrics.histogram(
+    "llm_parse_duration_seconds", "Query parse latency, single queries and batches.",
+    ("mode",))
+llm_parses = metrics.counter(
+    "llm_parses_total", "Parsed queries by result: gemini, cached, fallback_no_key or fallback_error.",
+    ("result",))
@@ -1,7 +1,8 @@
 # app/models.py
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, NamedTuple, Optional
 from pydantic import BaseModel, Field
+from app.pricing import parse_price
 
 class ProductInfo(BaseModel):
     """Model for parsed product information."""
@@ -20,6 +21,40 @@ class PriceOffer(BaseModel):
     productName: str = Field(description="Product name")
     source: str = Field(description="Retailer source")
     
+class Offer(NamedTuple):
+    """A scraped offer as it moves through the pipeline.
+    
+    A tuple rather than a dict: compact, immutable, and carrying the numeric
+    price for ranking plus whether it is demo data. ``to_dict`` gives the
+    public PriceOffer shape.
+    """
+    link: str
+    price: str
+    currency: str
+    productName: str
+    source: str
+    price_numeric: float
+    is_mock: bool = False
+    
+    @classmethod
+    def from_dict(cls, offer: Dict[str, Any], country: str = "US",
+                  is_mock: bool = False) -> Optional["Offer"]:
+        """Build an offer from a PriceOffer-shaped dict, or None if its price does not parse."""
+        price = parse_price(str(offer.get("price", "")), country, offer.get("currency") or None)
+        if price is None:
+            return None
+        return cls(offer.get("link", ""), price.text, price.currency or "", offer.get("productName", ""),
+                   offer.get("source", ""), price.amount, is_mock)
+    
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            "link": self.link,
+            "price": self.price,
+            "currency": self.currency,
+            "productName": self.productName,
+            "source": self.source
+        }
+
 class SearchQuery(BaseModel):
     """Model for search query input."""
     country: str = Field(description="Country code (e.g., US, IN)")
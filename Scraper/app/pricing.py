@@ -0,0 +1,115 @@
+# app/pricing.py
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Countries that write prices as 1.299,00 (comma decimal, dot or space grouping)
+DECIMAL_COMMA_COUNTRIES = frozenset({
+    "DE", "FR", "ES", "IT", "NL", "BE", "AT", "FI", "SE", "NO", "DK",
+    "BR", "ID", "VN",
+})
+# Currencies without minor units: 1.299 or 1,299 is a thousands group, and any
+# decimal part that does show up is rounded away
+ZERO_DECIMAL_CURRENCIES = frozenset({"JPY", "KRW", "VND", "IDR"})
+
+# Unambiguous symbols and ISO codes; "$", "¥" and "kr" are left to the country default
+CURRENCY_SYMBOLS: Dict[str, Optional[str]] = {
+    "US$": "USD", "C$": "CAD", "CA$": "CAD", "A$": "AUD", "AU$": "AUD", "S$": "SGD",
+    "R$": "BRL", "MX$": "MXN", "€": "EUR", "£": "GBP", "₹": "INR", "Rs": "INR",
+    "Rs.": "INR", "₩": "KRW", "₫": "VND", "฿": "THB", "₱": "PHP", "Rp": "IDR",
+    "RM": "MYR", "CHF": "CHF", "$": None, "¥": None, "￥": None, "kr": None,
+}
+CURRENCY_CODES = frozenset({
+    "USD", "EUR", "GBP", "INR", "JPY", "CNY", "CAD", "AUD", "BRL", "MXN", "SGD",
+    "MYR", "THB", "IDR", "PHP", "VND", "KRW", "CHF", "SEK", "NOK", "DKK",
+})
+
+def _marker_pattern(marker: str) -> str:
+    # Letter markers ("Rs", "EUR") must not be part of a longer word
+    pattern = re.escape(marker)
+    if marker[0].isalpha():
+        pattern = r"(?<![A-Za-z])" + pattern
+    if marker[-1].isalpha():
+        pattern += r"(?![A-Za-z])"
+    return pattern
+
+# One scan finds both the amount and any currency marker next to it. Amounts may
+# use dot, comma or apostrophe separators, or (no-break) spaces before 3-digit groups.
+_PRICE_TOKENS = re.compile(
+    r"(?P<number>\d+(?:[.,']\d+|[ \u00a0\u202f]\d{3}(?!\d))*)"
+    r"|(?P<currency>" + "|".join(
+        _marker_pattern(marker)
+        for marker in sorted(set(CURRENCY_SYMBOLS) | CURRENCY_CODES, key=len, reverse=True)
+    ) + ")"
+)
+_SEPARATORS = re.compile(r"[.,' \u00a0\u202f]")
+
+class ParsedPrice(NamedTuple):
+    """A price read from retailer text: the amount, its normalized text and currency if shown."""
+    amount: float
+    text: str
+    currency: Optional[str]
+
+def _normalize(number: str, country: str, currency: Optional[str]) -> str:
+    """Rewrite a matched number as plain digits with an optional '.' decimal part."""
+    groups = _SEPARATORS.split(number)
+    if len(groups) == 1:
+        return number
+    marks = [char for char in number if not char.isdigit()]
+    last_mark, tail = marks[-1], groups[-1]
+    # The last mark is the decimal point when it differs from the marks before it,
+    # or when it is the only one and is not followed by a three-digit group
+    if last_mark in ".,":
+        if len(set(marks)) > 1:
+            is_decimal = last_mark not in marks[:-1]
+        elif len(marks) > 1:
+            is_decimal = False
+        elif len(tail) != 3:
+            is_decimal = True
+        elif currency in ZERO_DECIMAL_CURRENCIES:
+            is_decimal = False
+        else:
+            # 1.299 / 1,299: read it the way the country writes prices
+            is_decimal = last_mark == ("," if country in DECIMAL_COMMA_COUNTRIES else ".")
+    else:
+        is_decimal = False
+    if not is_decimal:
+        return "".join(groups)
+    integer = "".join(groups[:-1])
+    if currency in ZERO_DECIMAL_CURRENCIES:
+        return str(round(float(integer + "." + tail)))
+    return integer + "." + tail
+
+def parse_price(price_text: str, country: str = "US",
+                default_currency: Optional[str] = None) -> Optional[ParsedPrice]:
+    """Parse the first price in retailer text, honouring the country's separators.
+
+    Returns None when the text holds no number. The currency is the one shown
+    next to the amount, or ``default_currency`` for bare or ambiguous symbols.
+    """
+    if not price_text:
+        return None
+    country = (country or "US").upper()
+    number = None
+    currency = None
+    for token in _PRICE_TOKENS.finditer(price_text):
+        if token.lastgroup == "number":
+            if number is not None:
+                break  # Second amount, e.g. the top of a range or a struck-out price
+            number = token.group()
+        elif currency is None:
+            marker = token.group()
+            currency = CURRENCY_SYMBOLS.get(marker, marker)
+            if number is not None:
+                break
+    if number is None:
+        return None
+    currency = currency or default_currency
+    text = _normalize(number.strip(), country, currency)
+    return ParsedPrice(float(text), text, currency)
+
+def parse_prices(price_texts: Iterable[str], country: str = "US",
+                 default_currency: Optional[str] = None) -> List[Optional[ParsedPrice]]:
+    """parse_price over a page of price strings that share a country."""
+    country = (country or "US").upper()
+    return [parse_price(text, country, default_currency) for text in price_texts]
@@ -0,0 +1,74 @@
+# app/rate_limiter.py
+
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+
+# Outbound requests per second allowed to each retailer domain (0 disables limiting)
+DOMAIN_RATE_LIMIT = float(os.getenv("DOMAIN_RATE_LIMIT", "5"))
+# Requests a domain may receive in a burst before the rate applies
+DOMAIN_BURST = int(os.getenv("DOMAIN_BURST", "10"))
+
+class RateLimited(Exception):
+    """Raised when a request would have to wait longer than the caller allows."""
+
+class TokenBucket:
+    """Token bucket shared by every request to one domain.
+
+    Tokens are reserved up front, so concurrent callers queue in arrival order
+    without a lock: each one sleeps for its own share of the deficit.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.waited = 0
+        self.rejected = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        """Take a token, sleeping until it is available.
+
+        Raises RateLimited without taking a token if the wait would exceed max_wait.
+        """
+        self._refill()
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if max_wait is not None and wait > max_wait:
+            self.rejected += 1
+            raise RateLimited(f"Rate limit needs a {wait:.1f}s wait, only {max_wait:.1f}s allowed")
+        self.tokens -= 1
+        if wait > 0:
+            self.waited += 1
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {"tokens": round(self.tokens, 2), "waited": self.waited, "rejected": self.rejected}
+
+class DomainRateLimiter:
+    """One token bucket per domain, created on first use."""
+
+    def __init__(self, rate: float = DOMAIN_RATE_LIMIT, burst: int = DOMAIN_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, domain: str, max_wait: Optional[float] = None) -> None:
+        if self.rate <= 0:
+            return
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = self._buckets[domain] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire(max_wait)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {domain: bucket.stats() for domain, bucket in sorted(self._buckets.items())}
+
+domain_rate_limiter = DomainRateLimiter()
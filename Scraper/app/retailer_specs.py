@@ -0,0 +1,200 @@
+# app/retailer_specs.py
+
+import re
+from typing import Any, Dict, List, Optional
+from app.html_parser import Selector, resolve_backend
+
+# Declarative scraping specs. Selector lists are tried in order and the first
+# match wins. Adding a retailer that serves a plain HTML results page only
+# needs a new entry here plus a registry line in retailers.py that names it,
+# e.g. {"name": "BestBuy", "spec": "bestbuy", "priority": 2}.
+#
+#   search_url      URL template with {domain} and {query} (already URL-encoded)
+#   domains         country code -> domain; default_domain is used otherwise
+#   source          offer source label, may contain {country}
+#   currency        fixed currency code; omit to use the country's currency
+#   containers      selectors for one product card each
+#   name/price/link selectors within a product card
+#   price_pattern   regex tried on the card text when no price selector matches
+#   require_link    drop products without a link instead of linking the search page
+#   render_fallback re-run the spec on a browser-rendered page when the plain
+#                   fetch fails or finds no product cards
+#   cache_ttl       seconds a fetched results page stays fresh in the shared
+#                   fetch cache (default FETCH_CACHE_TTL_SECONDS)
+RETAILER_SPECS: Dict[str, Dict[str, Any]] = {
+    "amazon": {
+        "search_url": "https://www.{domain}/s?k={query}",
+        "domains": {
+            'US': 'amazon.com',
+            'IN': 'amazon.in',
+            'GB': 'amazon.co.uk',
+            'DE': 'amazon.de',
+            'FR': 'amazon.fr',
+            'CA': 'amazon.ca',
+            'AU': 'amazon.com.au',
+            'JP': 'amazon.co.jp',
+            'BR': 'amazon.com.br',
+            'MX': 'amazon.com.mx',
+            'SG': 'amazon.sg'
+        },
+        "default_domain": "amazon.com",
+        "source": "Amazon {country}",
+        "containers": [
+            '[data-component-type="s-search-result"]',
+            '.s-result-item',
+            '.s-asin',
+            '[data-asin]'
+        ],
+        "name": [
+            'h2 a span',
+            '.a-size-medium span',
+            '.a-text-normal',
+            'h2 span',
+            '.s-link-style span',
+            'span[data-component-type="s-search-result"] h2 a span'
+        ],
+        "price": [
+            '.a-price .a-offscreen',
+            '.a-price-whole',
+            '.a-price-range',
+            '.a-price',
+            'span.a-price-whole',
+            'span.a-price.a-text-price.a-size-medium.apexPriceToPay',
+            '.a-price-range .a-offscreen',
+            '.a-price .a-price-whole',
+            '.a-price .a-price-fraction',
+            '.a-color-price',
+            '.a-price-symbol',
+            '[data-cy="price-recipe"]',
+            '.a-text-price',
+            '.a-size-medium.a-color-price',
+            '.a-size-base.a-color-price',
+            '.a-size-small.a-color-price'
+        ],
+        "price_pattern": r'\$[\d,]+\.?\d*',
+        "link": [
+            'h2 a',
+            '.a-link-normal',
+            'a[href*="/dp/"]',
+            'a[href*="/gp/"]'
+        ],
+        "require_link": False,
+        "render_fallback": True,
+        "render_wait_for": "h2",
+        "cache_ttl": 600,
+    },
+    "ebay": {
+        "search_url": "https://www.{domain}/sch/i.html?_nkw={query}",
+        "domains": {
+            'US': 'ebay.com',
+            'GB': 'ebay.co.uk',
+            'DE': 'ebay.de',
+            'FR': 'ebay.fr',
+            'CA': 'ebay.ca',
+            'AU': 'ebay.com.au',
+            'JP': 'ebay.co.jp'
+        },
+        "default_domain": "ebay.com",
+        "source": "eBay {country}",
+        "containers": ['div.s-item'],
+        "name": ['h3.s-item__title'],
+        "price": ['span.s-item__price'],
+        "link": ['a.s-item__link'],
+        # Auction prices move quickly
+        "cache_ttl": 120,
+    },
+    "flipkart": {
+        "search_url": "https://www.{domain}/search?q={query}",
+        "default_domain": "flipkart.com",
+        "source": "Flipkart",
+        "currency": "INR",
+        "containers": ['div[data-id]', '._1AtVbE', '._13oc-S', '._2kHMtA'],
+        "name": ['._4rR01T', '.s1Q9rs', '._2WkVRV', 'a._1fQZEK'],
+        "price": ['._30jeq3', '._1_WHN1', '.Nx9bqj', '._3tbr2p'],
+        "link": ['a._1fQZEK, a._2UzuFa'],
+    },
+    "bestbuy": {
+        "search_url": "https://www.{domain}/site/searchpage.jsp?st={query}",
+        "default_domain": "bestbuy.com",
+        "source": "BestBuy",
+        "currency": "USD",
+        "containers": ['.sku-item'],
+        "name": ['.sku-title a'],
+        "price": ['.pricing-current-price'],
+        "link": ['.sku-title a'],
+        "require_link": False,
+    },
+    "walmart": {
+        "search_url": "https://www.{domain}/search/?query={query}",
+        "default_domain": "walmart.com",
+        "source": "Walmart",
+        "containers": ['[data-automation-id="product-title"]'],
+        "name": ['span'],
+        "price": ['[data-automation-id="product-price"]'],
+        "link": ['a'],
+        "require_link": False,
+    },
+    "target": {
+        "search_url": "https://www.{domain}/s?searchTerm={query}",
+        "default_domain": "target.com",
+        "source": "Target",
+        "currency": "USD",
+        "containers": ['[data-test="product-details"]'],
+        "name": ['a'],
+        "price": ['[data-test="product-price"]'],
+        "link": ['a'],
+        "require_link": False,
+    },
+}
+
+class RetailerSpec:
+    """A retailer spec with its selectors compiled for reuse across requests."""
+
+    __slots__ = (
+        "key", "config", "search_url_template", "domains", "default_domain", "source_template",
+        "currency", "containers", "name", "price", "link", "price_pattern",
+        "require_link", "render_fallback", "render_wait_for", "cache_ttl",
+    )
+
+    def __init__(self, key: str, config: Dict[str, Any]):
+        self.key = key
+        self.config = config  # Kept so worker processes can rebuild the spec
+        self.search_url_template: str = config["search_url"]
+        self.domains: Dict[str, str] = config.get("domains", {})
+        self.default_domain: str = config.get("default_domain", f"{key}.com")
+        self.source_template: str = config["source"]
+        self.currency: Optional[str] = config.get("currency")
+        self.containers: List[Selector] = [Selector(css) for css in config["containers"]]
+        self.name: List[Selector] = [Selector(css) for css in config["name"]]
+        self.price: List[Selector] = [Selector(css) for css in config["price"]]
+        self.link: List[Selector] = [Selector(css) for css in config.get("link", [])]
+        pattern = config.get("price_pattern")
+        self.price_pattern = re.compile(pattern) if pattern else None
+        self.require_link: bool = config.get("require_link", True)
+        self.render_fallback: bool = config.get("render_fallback", False)
+        self.render_wait_for: Optional[str] = config.get("render_wait_for")
+        self.cache_ttl: Optional[float] = config.get("cache_ttl")
+
+        if resolve_backend() != "selectolax":
+            # Compile up front so bad selectors fail at import; selectolax needs no
+            # soupsieve patterns, so the soup stack stays unloaded with it
+            for selector in self.containers + self.name + self.price + self.link:
+                selector.compiled
+
+    def domain(self, country: str) -> str:
+        return self.domains.get(country, self.default_domain)
+
+    def search_url(self, country: str, encoded_query: str) -> str:
+        return self.search_url_template.format(domain=self.domain(country), query=encoded_query)
+
+    def source(self, country: str) -> str:
+        return self.source_template.format(country=country)
+
+    def __repr__(self) -> str:
+        return f"RetailerSpec({self.key!r})"
+
+# Compiled once at import and shared by every request
+SPECS: Dict[str, RetailerSpec] = {key: RetailerSpec(key, config) for key, config in RETAILER_SPECS.items()}
+
+def get_spec(key: str) -> RetailerSpec:
+    return SPECS[key]
@@ -0,0 +1,130 @@
+# app/retailer_stats.py
+
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Recent scrapes remembered per retailer
+RETAILER_STATS_WINDOW = int(os.getenv("RETAILER_STATS_WINDOW", "50"))
+# Scrapes needed before a retailer's stats drive its order and timeout
+RETAILER_STATS_MIN_SAMPLES = int(os.getenv("RETAILER_STATS_MIN_SAMPLES", "5"))
+# Per-retailer timeout is this multiple of its observed p95, within [min, request budget]
+RETAILER_TIMEOUT_P95_MULTIPLIER = float(os.getenv("RETAILER_TIMEOUT_P95_MULTIPLIER", "1.5"))
+RETAILER_MIN_TIMEOUT_SECONDS = float(os.getenv("RETAILER_MIN_TIMEOUT_SECONDS", "3"))
+# Consecutive scrapes without offers after which a retailer is skipped
+RETAILER_SKIP_AFTER_EMPTY = int(os.getenv("RETAILER_SKIP_AFTER_EMPTY", "10"))
+# How often a skipped retailer is still tried, so it can recover
+RETAILER_PROBE_INTERVAL_SECONDS = float(os.getenv("RETAILER_PROBE_INTERVAL_SECONDS", "60"))
+
+class RetailerStats:
+    """Rolling latency, success and yield figures for one retailer."""
+
+    def __init__(self, name: str, window: int = RETAILER_STATS_WINDOW):
+        self.name = name
+        self._latencies: deque = deque(maxlen=window)
+        self._successes: deque = deque(maxlen=window)
+        self._offers: deque = deque(maxlen=window)
+        self.consecutive_empty = 0
+        self.skipped = 0
+        self._last_probe_at = 0.0
+
+    def record(self, seconds: float, success: bool, offers: int) -> None:
+        self._latencies.append(seconds)
+        self._successes.append(success)
+        self._offers.append(offers)
+        if offers:
+            if self.consecutive_empty >= RETAILER_SKIP_AFTER_EMPTY:
+                print(f"{self.name} is yielding offers again")
+            self.consecutive_empty = 0
+        else:
+            self.consecutive_empty += 1
+            if self.consecutive_empty == RETAILER_SKIP_AFTER_EMPTY:
+                # The probe interval starts now, not at the last probe
+                self._last_probe_at = time.monotonic()
+                print(f"Skipping {self.name} after {self.consecutive_empty} scrapes without offers")
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    @property
+    def success_rate(self) -> float:
+        return sum(self._successes) / len(self._successes) if self._successes else 0.0
+
+    @property
+    def avg_offers(self) -> float:
+        return sum(self._offers) / len(self._offers) if self._offers else 0.0
+
+    @property
+    def warmed_up(self) -> bool:
+        return self.samples >= RETAILER_STATS_MIN_SAMPLES
+
+    def timeout(self, default: float) -> float:
+        """Time allowed for one scrape: a multiple of the p95, capped by ``default``."""
+        if not self.warmed_up:
+            return default
+        p95 = self.percentile(0.95)
+        return min(default, max(RETAILER_MIN_TIMEOUT_SECONDS, p95 * RETAILER_TIMEOUT_P95_MULTIPLIER))
+
+    def should_skip(self) -> bool:
+        """Whether to leave this retailer out; lets one probe through per interval."""
+        if self.consecutive_empty < RETAILER_SKIP_AFTER_EMPTY:
+            return False
+        now = time.monotonic()
+        if now - self._last_probe_at >= RETAILER_PROBE_INTERVAL_SECONDS:
+            self._last_probe_at = now
+            print(f"Probing {self.name} after {self.consecutive_empty} scrapes without offers")
+            return False
+        self.skipped += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.50), self.percentile(0.95)
+        return {
+            "samples": self.samples,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "success_rate": round(self.success_rate, 3),
+            "avg_offers": round(self.avg_offers, 2),
+            "consecutive_empty": self.consecutive_empty,
+            "skipped": self.skipped,
+        }
+
+class RetailerStatsStore:
+    """Stats for every retailer, created on first use, and the scheduling built on them."""
+
+    def __init__(self):
+        self._stats: Dict[str, RetailerStats] = {}
+
+    def get(self, name: str) -> RetailerStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = RetailerStats(name)
+        return stats
+
+    def schedule(self, retailers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop retailers that keep yielding nothing and order the rest by expected offers.
+
+        Retailers without enough samples go first so they get measured; the
+        rest start in order of average offers per scrape times success rate,
+        with the registry priority breaking ties.
+        """
+        def key(retailer: Dict[str, Any]):
+            stats = self.get(retailer["name"])
+            expected = stats.avg_offers * stats.success_rate if stats.warmed_up else float("inf")
+            return (-expected, retailer.get("priority", 999))
+
+        scheduled = [retailer for retailer in retailers if not self.get(retailer["name"]).should_skip()]
+        return sorted(scheduled, key=key)
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.stats() for name, stats in sorted(self._stats.items())}
+
+retailer_stats = RetailerStatsStore()
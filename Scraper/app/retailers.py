@@ -1,13 +1,49 @@
 # app/retailers.py
 
-from app.scraper import (
-    scrape_amazon, scrape_flipkart, scrape_bestbuy, scrape_ebay,
-    scrape_walmart, scrape_target, scrape_myntra, scrape_snapdeal,
-    scrape_paytm, scrape_croma, scrape_reliance_digital, scrape_currys,
-    scrape_argos, scrape_john_lewis, scrape_conrad, scrape_mediamarkt,
-    scrape_fnac, scrape_cdiscount, scrape_rakuten, scrape_mercadolibre,
-    scrape_alibaba, scrape_tmall, scrape_jd, scrape_shopee
-)
+from typing import Any, Awaitable, Callable, Dict, List
+from app.circuit_breaker import domain_breakers
+from app.retailer_specs import SPECS
+
+def _scraper(name: str) -> Callable[[Dict[str, Any]], Awaitable[List]]:
+    """Stand-in for an app.scraper function that imports the scraper stack on first call.
+    
+    Keeps the HTTP client, HTML parsers and matcher out of the import path, so
+    a cold start can serve /health or a cached result before any of them load.
+    """
+    async def scrape(product_info: Dict[str, Any]) -> List:
+        from app import scraper
+        return await getattr(scraper, name)(product_info)
+    scrape.__name__ = scrape.__qualname__ = name
+    return scrape
+
+def _spec_scraper(spec_key: str) -> Callable[[Dict[str, Any]], Awaitable[List]]:
+    """Scraper for a registry entry that names a retailer spec instead of a function."""
+    spec = SPECS[spec_key]  # Fail at import on a typo, not on the first request
+    async def scrape(product_info: Dict[str, Any]) -> List:
+        from app.scraper import scrape_with_spec
+        return await scrape_with_spec(spec, product_info)
+    scrape.__name__ = scrape.__qualname__ = f"scrape_{spec_key}"
+    return scrape
+
+# Hand-written scrapers used in the registry, resolved in app.scraper on first call
+scrape_myntra = _scraper("scrape_myntra")
+scrape_snapdeal = _scraper("scrape_snapdeal")
+scrape_paytm = _scraper("scrape_paytm")
+scrape_croma = _scraper("scrape_croma")
+scrape_reliance_digital = _scraper("scrape_reliance_digital")
+scrape_currys = _scraper("scrape_currys")
+scrape_argos = _scraper("scrape_argos")
+scrape_john_lewis = _scraper("scrape_john_lewis")
+scrape_conrad = _scraper("scrape_conrad")
+scrape_mediamarkt = _scraper("scrape_mediamarkt")
+scrape_fnac = _scraper("scrape_fnac")
+scrape_cdiscount = _scraper("scrape_cdiscount")
+scrape_rakuten = _scraper("scrape_rakuten")
+scrape_mercadolibre = _scraper("scrape_mercadolibre")
+scrape_alibaba = _scraper("scrape_alibaba")
+scrape_tmall = _scraper("scrape_tmall")
+scrape_jd = _scraper("scrape_jd")
+scrape_shopee = _scraper("scrape_shopee")
 
 COUNTRY_ALIASES = {
     "India": "IN",
@@ -45,17 +81,22 @@ COUNTRY_ALIASES = {
     "Finland": "FI",
 }
 
+# Each entry either names a spec in app/retailer_specs.py ("spec") or gives a
+# hand-written scraper ("scrape_func"). Optional max_concurrency caps one
+# retailer's simultaneous scrapes (default RETAILER_MAX_CONCURRENCY); Amazon
+# and eBay get less, since their slow paths (Playwright fallback, heavy pages)
+# would otherwise pile up
 RETAILER_REGISTRY = {
     "US": [
-        {"name": "Amazon US", "scrape_func": scrape_amazon, "priority": 1},
-        {"name": "BestBuy", "scrape_func": scrape_bestbuy, "priority": 2},
-        {"name": "Walmart", "scrape_func": scrape_walmart, "priority": 3},
-        {"name": "Target", "scrape_func": scrape_target, "priority": 4},
-        {"name": "eBay US", "scrape_func": scrape_ebay, "priority": 5},
+        {"name": "Amazon US", "spec": "amazon", "priority": 1, "max_concurrency": 4},
+        {"name": "BestBuy", "spec": "bestbuy", "priority": 2},
+        {"name": "Walmart", "spec": "walmart", "priority": 3},
+        {"name": "Target", "spec": "target", "priority": 4},
+        {"name": "eBay US", "spec": "ebay", "priority": 5, "max_concurrency": 4},
     ],
     "IN": [
-        {"name": "Amazon IN", "scrape_func": scrape_amazon, "priority": 1},
-        {"name": "Flipkart", "scrape_func": scrape_flipkart, "priority": 2},
+        {"name": "Amazon IN", "spec": "amazon", "priority": 1, "max_concurrency": 4},
+        {"name": "Flipkart", "spec": "flipkart", "priority": 2},
         {"name": "Myntra", "scrape_func": scrape_myntra, "priority": 3},
         {"name": "Snapdeal", "scrape_func": scrape_snapdeal, "priority": 4},
         {"name": "Paytm Mall", "scrape_func": scrape_paytm, "priority": 5},
@@ -63,38 +104,38 @@ RETAILER_REGISTRY = {
         {"name": "Reliance Digital", "scrape_func": scrape_reliance_digital, "priority": 7},
     ],
     "GB": [
-        {"name": "Amazon UK", "scrape_func": scrape_amazon, "priority": 1},
+        {"name": "Amazon UK", "spec": "amazon", "priority": 1, "max_concurrency": 4},
         {"name": "Currys", "scrape_func": scrape_currys, "priority": 2},
         {"name": "Argos", "scrape_func": scrape_argos, "priority": 3},
         {"name": "John Lewis", "scrape_func": scrape_john_lewis, "priority": 4},
-        {"name": "eBay UK", "scrape_func": scrape_ebay, "priority": 5},
+        {"name": "eBay UK", "spec": "ebay", "priority": 5, "max_concurrency": 4},
     ],
     "DE": [
-        {"name": "Amazon DE", "scrape_func": scrape_amazon, "priority": 1},
+        {"name": "Amazon DE", "spec": "amazon", "priority": 1, "max_concurrency": 4},
         {"name": "Conrad", "scrape_func": scrape_conrad, "priority": 2},
         {"name": "MediaMarkt", "scrape_func": scrape_mediamarkt, "priority": 3},
-        {"name": "eBay DE", "scrape_func": scrape_ebay, "priority": 4},
+        {"name": "eBay DE", "spec": "ebay", "priority": 4, "max_concurrency": 4},
     ],
     "FR": [
-        {"name": "Amazon FR", "scrape_func": scrape_amazon, "priority": 1},
+        {"name": "Amazon FR", "spec": "amazon", "priority": 1, "max_concurrency": 4},
         {"name": "Fnac", "scrape_func": scrape_fnac, "priority": 2},
         {"name": "Cdiscount", "scrape_func": scrape_cdiscount, "priority": 3},
-        {"name": "eBay FR", "scrape_func": scrape_ebay, "priority": 4},
+        {"name": "eBay FR", "spec": "ebay", "priority": 4, "max_concurrency": 4},
     ],
     "CA": [
-        {"name": "Amazon CA", "scrape_func": scrape_amazon, "priority": 1},
-        {"name": "BestBuy CA", "scrape_func": scrape_bestbuy, "priority": 2},
-        {"name": "Walmart CA", "scrape_func": scrape_walmart, "priority": 3},
-        {"name": "eBay CA", "scrape_func": scrape_ebay, "priority": 4},
+        {"name": "Amazon CA", "spec": "amazon", "priority": 1, "max_concurrency": 4},
+        {"name": "BestBuy CA", "spec": "bestbuy", "priority": 2},
+        {"name": "Walmart CA", "spec": "walmart", "priority": 3},
+        {"name": "eBay CA", "spec": "ebay", "priority": 4, "max_concurrency": 4},
     ],
     "AU": [
-        {"name": "Amazon AU", "scrape_func": scrape_amazon, "priority": 1},
-        {"name": "eBay AU", "scrape_func": scrape_ebay, "priority": 2},
+        {"name": "Amazon AU", "spec": "amazon", "priority": 1, "max_concurrency": 4},
+        {"name": "eBay AU", "spec": "ebay", "priority": 2, "max_concurrency": 4},
     ],
     "JP": [
-        {"name": "Amazon JP", "scrape_func": scrape_amazon, "priority": 1},
+        {"name": "Amazon JP", "spec": "amazon", "priority": 1, "max_concurrency": 4},
         {"name": "Rakuten", "scrape_func": scrape_rakuten, "priority": 2},
-        {"name": "eBay JP", "scrape_func": scrape_ebay, "priority": 3},
+        {"name": "eBay JP", "spec": "ebay", "priority": 3, "max_concurrency": 4},
     ],
     "CN": [
         {"name": "Alibaba", "scrape_func": scrape_alibaba, "priority": 1},
@@ -102,7 +143,7 @@ RETAILER_REGISTRY = {
         {"name": "JD.com", "scrape_func": scrape_jd, "priority": 3},
     ],
     "SG": [
-        {"name": "Amazon SG", "scrape_func": scrape_amazon, "priority": 1},
+        {"name": "Amazon SG", "spec": "amazon", "priority": 1, "max_concurrency": 4},
         {"name": "Shopee SG", "scrape_func": scrape_shopee, "priority": 2},
     ],
     "MY": [
@@ -122,19 +163,46 @@ RETAILER_REGISTRY = {
     ],
     "BR": [
         {"name": "MercadoLibre", "scrape_func": scrape_mercadolibre, "priority": 1},
-        {"name": "Amazon BR", "scrape_func": scrape_amazon, "priority": 2},
+        {"name": "Amazon BR", "spec": "amazon", "priority": 2, "max_concurrency": 4},
     ],
     "MX": [
         {"name": "MercadoLibre MX", "scrape_func": scrape_mercadolibre, "priority": 1},
-        {"name": "Amazon MX", "scrape_func": scrape_amazon, "priority": 2},
+        {"name": "Amazon MX", "spec": "amazon", "priority": 2, "max_concurrency": 4},
     ],
 }
 
-def get_retailers_for_country(country_code: str) -> list:
-    """Get list of retailers for a specific country."""
+# Spec-driven entries get their scraper from the spec
+for _retailers in RETAILER_REGISTRY.values():
+    for _retailer in _retailers:
+        if "spec" in _retailer:
+            _retailer.setdefault("scrape_func", _spec_scraper(_retailer["spec"]))
+
+def get_retailer_domain(retailer: dict, country_code: str):
+    """Domain a registry entry scrapes in a country, or None if it has no spec."""
+    spec_key = retailer.get("spec")
+    if spec_key is None:
+        return None
+    return SPECS[spec_key].domain(COUNTRY_ALIASES.get(country_code, country_code).upper())
+
+def get_retailers_for_country(country_code: str, skip_open_circuits: bool = False) -> list:
+    """Get list of retailers for a specific country.
+    
+    With skip_open_circuits, retailers whose domain circuit breaker is open are
+    left out, so no task is spent on a request that would fail fast anyway.
+    """
     code = COUNTRY_ALIASES.get(country_code, country_code).upper()
     retailers = RETAILER_REGISTRY.get(code, [])
     
+    if skip_open_circuits:
+        available = []
+        for retailer in retailers:
+            domain = get_retailer_domain(retailer, code)
+            if domain and domain_breakers.is_open(domain):
+                print(f"Skipping {retailer['name']}: circuit open for {domain}")
+                continue
+            available.append(retailer)
+        retailers = available
+    
     # Sort by priority (lower number = higher priority)
     return sorted(retailers, key=lambda x: x.get('priority', 999))
 
@@ -1,19 +1,42 @@
 # app/scraper.py
 
-import re
+import os
 import time
 import random
-from typing import List, Dict, Any, Optional
-from urllib.parse import urlencode, quote_plus
-import requests
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from fuzzywuzzy import fuzz
-from tenacity import retry, stop_after_attempt, wait_exponential
+import asyncio
+from collections import defaultdict, deque
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urljoin, urlparse, quote_plus
+import httpx
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+from app import fixtures
+from app.browser_pool import render_page
+from app.circuit_breaker import CircuitOpenError, domain_breakers
+from app.html_parser import Node, Selector, parse_html
+from app.matcher import get_matcher
+from app.models import Offer
+from app.pricing import parse_prices
+from app.retailer_specs import SPECS, RetailerSpec
+from app.deadline import DeadlineExceeded, get_deadline, stop_at_deadline
+from app.degradation import render_allowed
+from app.extract_pool import extraction_pool
+from app.fetch_cache import FETCH_CACHE_TTL_SECONDS, fetch_cache
+from app.rate_limiter import domain_rate_limiter
+from app.tracing import add_event, span
+from app.metrics import fetch_latency, fetch_responses, fetch_retries, retailer_funnel
 
 # Constants
 MAX_RESULTS_PER_SITE = 10
 REQUEST_TIMEOUT = 30
+MAX_CONNECTIONS = 200
+MAX_KEEPALIVE_CONNECTIONS = 50
+MIN_ATTEMPT_SECONDS = 1.0
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 100
+# Send every retailer request to this base URL instead, as {override}/{host}{path}?{query}
+# (e.g. http://127.0.0.1:9000 for the fake retailer server in benchmarks/)
+RETAILER_OVERRIDE_URL = os.getenv("RETAILER_OVERRIDE_URL", "").rstrip("/")
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -24,95 +47,37 @@ def get_random_user_agent() -> str:
     """Get a random user agent."""
     return random.choice(USER_AGENTS)
 
-def clean_price(price_text: str) -> str:
-    """Clean price text and extract numeric value."""
-    if not price_text:
-        return ""
-    
-    # Remove currency symbols and extract numbers
-    price_clean = re.sub(r'[^\d.,]', '', price_text)
-    price_clean = re.sub(r'[,]', '', price_clean)  # Remove commas
-    
-    # Extract first number (price)
-    match = re.search(r'[\d.]+', price_clean)
-    return match.group() if match else ""
+def default_headers() -> Dict[str, str]:
+    """Browser-like request headers with a random user agent."""
+    return {
+        'User-Agent': get_random_user_agent(),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate',
+        'DNT': '1',
+        'Connection': 'keep-alive'
+    }
+
+def route_url(url: str) -> str:
+    """URL actually fetched for a retailer URL, honouring RETAILER_OVERRIDE_URL."""
+    if not RETAILER_OVERRIDE_URL:
+        return url
+    parts = urlparse(url)
+    routed = f"{RETAILER_OVERRIDE_URL}/{parts.netloc}{parts.path or '/'}"
+    return f"{routed}?{parts.query}" if parts.query else routed
 
 def is_product_match(product_name: str, query_info: Dict[str, Any], threshold: int = 60) -> bool:
     """Check if product name matches the query using fuzzy matching."""
-    if not product_name:
-        return False
-    
-    product_name_lower = product_name.lower()
-    
-    # Check brand match - this is crucial
-    brand = query_info.get('brand', '').lower()
-    if brand and brand not in product_name_lower:
-        print(f"Brand mismatch: '{brand}' not in '{product_name_lower}'")
-        return False
-    
-    # Check model match - for specific models, this is also crucial
-    model = query_info.get('model', '').lower()
-    if model:
-        # Remove common punctuation from model
-        model_clean = re.sub(r'[,.]', '', model)
-        model_words = model_clean.split()
-        
-        # Check if all significant model words are present
-        significant_words = [word for word in model_words if len(word) > 2 or word.isdigit()]
-        if significant_words:
-            matches = sum(1 for word in significant_words if word in product_name_lower)
-            if matches < len(significant_words) * 0.5:  # At least 50% of model words should match
-                print(f"Model mismatch: '{model}' vs '{product_name_lower}' - {matches}/{len(significant_words)} words match")
-                return False
-    
-    # Check specs match
-    specs = query_info.get('specs', '').lower()
-    if specs:
-        # For capacity/storage specs, be more flexible
-        if 'gb' in specs or 'tb' in specs:
-            # Extract capacity from specs
-            capacity_match = re.search(r'(\d+)\s*(gb|tb)', specs)
-            if capacity_match:
-                capacity = capacity_match.group(1)
-                if capacity not in product_name_lower:
-                    print(f"Capacity mismatch: '{capacity}' not in '{product_name_lower}'")
-                    # Don't return False here, as capacity might be mentioned differently
-    
-    # Use fuzzy matching for overall similarity
-    query_text = f"{brand} {model} {specs}".strip()
-    similarity = fuzz.partial_ratio(query_text, product_name_lower)
-    
-    print(f"Similarity score: {similarity} (threshold: {threshold})")
-    return similarity >= threshold
+    result = get_matcher(query_info, threshold).match(product_name)
+    if not result.keep:
+        print(f"No match ({result.reason}): {product_name[:50]}")
+    return result.keep
 
 def get_country_domain(country_code: str, base_domain: str) -> str:
     """Get the appropriate domain for a country."""
-    domain_map = {
-        'amazon': {
-            'US': 'amazon.com',
-            'IN': 'amazon.in',
-            'GB': 'amazon.co.uk',
-            'DE': 'amazon.de',
-            'FR': 'amazon.fr',
-            'CA': 'amazon.ca',
-            'AU': 'amazon.com.au',
-            'JP': 'amazon.co.jp',
-            'BR': 'amazon.com.br',
-            'MX': 'amazon.com.mx',
-            'SG': 'amazon.sg'
-        },
-        'ebay': {
-            'US': 'ebay.com',
-            'GB': 'ebay.co.uk',
-            'DE': 'ebay.de',
-            'FR': 'ebay.fr',
-            'CA': 'ebay.ca',
-            'AU': 'ebay.com.au',
-            'JP': 'ebay.co.jp'
-        }
-    }
-    
-    return domain_map.get(base_domain, {}).get(country_code, f"{base_domain}.com")
+    if base_domain in SPECS:
+        return SPECS[base_domain].domain(country_code)
+    return f"{base_domain}.com"
 
 def get_currency_for_country(country_code: str) -> str:
     """Get currency for country."""
@@ -126,597 +91,497 @@ def get_currency_for_country(country_code: str) -> str:
     }
     return currency_map.get(country_code, 'USD')
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def make_request(url: str, headers: Optional[Dict] = None) -> requests.Response:
-    """Make HTTP request with retry logic."""
+# Shared connection-pooled HTTP client, created on first use
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client, creating it if needed."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+class LatencyTracker:
+    """Rolling window of successful response latencies per domain."""
+    
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+    
+    def record(self, domain: str, seconds: float) -> None:
+        self._samples[domain].append(seconds)
+    
+    def percentile(self, domain: str, pct: float, min_samples: int = HEDGE_MIN_SAMPLES) -> Optional[float]:
+        samples = self._samples.get(domain)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+domain_latency = LatencyTracker()
+
+_retry_wait = wait_exponential(multiplier=1, min=4, max=10)
+
+def domain_of(url: str) -> str:
+    """Domain a URL counts against for breakers, rate limits and latency ("www." dropped)."""
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+def _on_retry(retry_state) -> None:
+    """Tenacity before_sleep hook: count the retry and mark it, with its backoff, on the fetch span."""
+    fetch_retries.inc(domain=domain_of(retry_state.args[0]))
+    add_event(
+        "retry",
+        attempt=retry_state.attempt_number,
+        wait_seconds=round(retry_state.next_action.sleep, 3),
+        error=repr(retry_state.outcome.exception()),
+    )
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after", "")
+    return float(value) if value.isdigit() else None
+
+async def _send(url: str, headers: Dict, timeout: float) -> httpx.Response:
+    """Single GET on the shared client.
+    
+    Waits for the domain's rate limit (within the attempt's timeout), then
+    records the outcome with the domain's circuit breaker and latency tracker.
+    """
+    domain = domain_of(url)
+    queued_at = time.monotonic()
+    await domain_rate_limiter.acquire(domain, max_wait=timeout)
+    start = time.monotonic()
+    timeout = max(0.0, timeout - (start - queued_at))
+    
+    breaker = domain_breakers.get(domain)
+    try:
+        response = await get_http_client().get(route_url(url), headers=headers, timeout=timeout)
+    except httpx.TransportError:
+        breaker.record_failure()
+        fetch_responses.inc(domain=domain, status="error")
+        raise
+    fetch_responses.inc(domain=domain, status=response.status_code)
+    if response.status_code == 429 or response.status_code >= 500:
+        breaker.record_failure(_retry_after_seconds(response))
+    else:
+        breaker.record_success()
+        if response.status_code < 400:
+            domain_latency.record(domain, time.monotonic() - start)
+    return response
+
+async def _send_hedged(url: str, headers: Dict, timeout: float) -> httpx.Response:
+    """Send a request, firing a duplicate if the first one outlives the domain's p95.
+    
+    Whichever copy succeeds first wins and the other is cancelled.
+    """
+    hedge_after = domain_latency.percentile(domain_of(url), 0.95)
+    if hedge_after is None or hedge_after >= timeout:
+        return await _send(url, headers, timeout)
+    
+    primary = asyncio.create_task(_send(url, headers, timeout))
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result()
+    
+    print(f"Hedging request to {url} after {hedge_after:.2f}s")
+    add_event("hedge", after_seconds=round(hedge_after, 3))
+    hedge = asyncio.create_task(_send(url, headers, max(0.0, timeout - hedge_after)))
+    pending = {primary, hedge}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        # Both copies failed; surface the primary's error
+        return primary.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+@retry(
+    stop=stop_after_attempt(3) | stop_at_deadline(_retry_wait, MIN_ATTEMPT_SECONDS),
+    wait=_retry_wait,
+    retry=retry_if_not_exception_type((CircuitOpenError, DeadlineExceeded)),
+    before_sleep=_on_retry,
+    reraise=True
+)
+async def _fetch_with_retry(url: str, headers: Optional[Dict] = None) -> httpx.Response:
+    """Make HTTP request with retry logic.
+    
+    If the calling task has a deadline, each attempt's timeout is capped by the
+    time remaining and retries stop once the budget cannot cover another attempt.
+    """
     if headers is None:
-        headers = {
-            'User-Agent': get_random_user_agent(),
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'DNT': '1',
-            'Connection': 'keep-alive'
-        }
+        headers = default_headers()
+    
+    timeout = REQUEST_TIMEOUT
+    deadline = get_deadline()
+    if deadline is not None:
+        timeout = min(timeout, deadline.remaining())
+        if timeout <= 0:
+            raise DeadlineExceeded(f"No time left to request {url}")
+    
+    # Fail fast, without retries, while the domain's circuit is open
+    domain_breakers.get(domain_of(url)).check()
     
     print(f"Making request to: {url}")
     try:
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        with span("fetch.attempt", domain=domain_of(url)) as attempt:
+            if HEDGE_REQUESTS:
+                response = await _send_hedged(url, headers, timeout)
+            else:
+                response = await _send(url, headers, timeout)
+            attempt.set(status=response.status_code)
         print(f"Response status: {response.status_code}")
-        response.raise_for_status()
+        if response.status_code != 304:  # Not Modified answers a fetch cache revalidation
+            response.raise_for_status()
         return response
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Request failed: {e}")
         raise
 
-# Amazon Scraper
-def scrape_amazon(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Scrape Amazon for product prices."""
-    country = product_info.get('country', 'US')
-    domain = get_country_domain(country, 'amazon')
-    currency = get_currency_for_country(country)
+async def make_request(url: str, headers: Optional[Dict] = None,
+                       cache_ttl: Optional[float] = None) -> httpx.Response:
+    """Fetch a URL through the shared fetch cache, if configured.
     
-    # Build search query
+    Depending on FETCH_MODE the response is also recorded as a fixture, or
+    replayed from one without touching the network or the cache.
+    """
+    domain = domain_of(url)
+    start = time.monotonic()
+    with span("fetch", domain=domain, url=url) as fetch:
+        try:
+            if fixtures.FETCH_MODE == "replay":
+                response = fixtures.load_response(url)
+                fetch.set(source="fixture", status=response.status_code)
+                response.raise_for_status()
+                return response
+            
+            if fetch_cache is not None:
+                request_headers = headers or default_headers()
+                response = await fetch_cache.fetch(
+                    url, request_headers, lambda conditional: _fetch_with_retry(url, conditional),
+                    ttl=cache_ttl if cache_ttl is not None else FETCH_CACHE_TTL_SECONDS
+                )
+                print(f"Fetch cache {response.headers.get('x-fetch-cache')}: {url}")
+                fetch.set(source=f"cache {response.headers.get('x-fetch-cache')}")
+            else:
+                response = await _fetch_with_retry(url, headers)
+            fetch.set(status=response.status_code, bytes=len(response.content))
+            if fixtures.FETCH_MODE == "record":
+                fixtures.record_response(url, response)
+            return response
+        finally:
+            fetch_latency.observe(time.monotonic() - start, domain=domain)
+
+def build_search_query(product_info: Dict[str, Any]) -> str:
+    """Search terms sent to retailers: brand, model and specs."""
     query_parts = [
         product_info.get('brand', ''),
         product_info.get('model', ''),
         product_info.get('specs', '')
     ]
-    search_query = ' '.join(filter(None, query_parts))
-    
-    if not search_query.strip():
-        return []
-    
-    amazon_url = f"https://www.{domain}/s?k={quote_plus(search_query)}"
-    print(f"Scraping Amazon {country}: {amazon_url}")
+    return ' '.join(filter(None, query_parts)).strip()
+
+def _first_match(item: Node, selectors: List[Selector]) -> Optional[Node]:
+    for selector in selectors:
+        element = item.select_one(selector)
+        if element is not None:
+            return element
+    return None
+
+def extract_offers(markup: str, spec: RetailerSpec, product_info: Dict[str, Any],
+                   page_url: str) -> Tuple[List[Offer], Dict[str, int]]:
+    """Run a retailer spec over a results page.
     
-    # First try with requests
-    try:
-        response = make_request(amazon_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        offers = []
-        # Look for product containers with various possible selectors
-        product_selectors = [
-            '[data-component-type="s-search-result"]',
-            '.s-result-item',
-            '.s-asin',
-            '[data-asin]'
-        ]
-        
-        products = []
-        for selector in product_selectors:
-            products = soup.select(selector)
-            if products:
-                print(f"Found {len(products)} products using selector: {selector}")
-                break
-        
-        if not products:
-            print("No products found with requests, trying with Playwright...")
-            return scrape_amazon_playwright(product_info)
-        
-        for product in products[:MAX_RESULTS_PER_SITE]:
-            try:
-                # Multiple selectors for product name
-                name_selectors = [
-                    'h2 a span',
-                    '.a-size-medium span',
-                    '.a-text-normal',
-                    'h2 span',
-                    '.s-link-style span',
-                    'span[data-component-type="s-search-result"] h2 a span'
-                ]
-                
-                product_name = ""
-                for selector in name_selectors:
-                    name_element = product.select_one(selector)
-                    if name_element:
-                        product_name = name_element.get_text(strip=True)
-                        break
-                
-                # Multiple selectors for price
-                price_selectors = [
-                    '.a-price .a-offscreen',
-                    '.a-price-whole',
-                    '.a-price-range',
-                    '.a-price',
-                    'span.a-price-whole',
-                    'span.a-price.a-text-price.a-size-medium.apexPriceToPay',
-                    '.a-price-range .a-offscreen',
-                    '.a-price .a-price-whole',
-                    '.a-price .a-price-fraction',
-                    '.a-color-price',
-                    '.a-price-symbol',
-                    '[data-cy="price-recipe"]',
-                    '.a-text-price',
-                    '.a-size-medium.a-color-price',
-                    '.a-size-base.a-color-price',
-                    '.a-size-small.a-color-price'
-                ]
-                
-                price_text = ""
-                for selector in price_selectors:
-                    price_element = product.select_one(selector)
-                    if price_element:
-                        price_text = price_element.get_text(strip=True)
-                        print(f"Found price with selector '{selector}': {price_text}")
-                        break
-                
-                # If no price found, try to find any text that looks like a price
-                if not price_text:
-                    all_text = product.get_text()
-                    price_matches = re.findall(r'\$[\d,]+\.?\d*', all_text)
-                    if price_matches:
-                        price_text = price_matches[0]
-                        print(f"Found price via regex: {price_text}")
-                
-                # Debug: print all text if no price found
-                if not price_text:
-                    print(f"No price found for product. All text: {product.get_text()[:200]}...")
-                    # Try to find any span with dollar signs or numbers
-                    price_spans = product.find_all('span', string=re.compile(r'[\$\d]'))
-                    for span in price_spans[:5]:  # Check first 5 spans
-                        text = span.get_text(strip=True)
-                        if re.search(r'\$[\d,]+\.?\d*', text):
-                            price_text = text
-                            print(f"Found price in span: {price_text}")
-                            break
-                
-                # Multiple selectors for link
-                link_selectors = [
-                    'h2 a',
-                    '.a-link-normal',
-                    'a[href*="/dp/"]',
-                    'a[href*="/gp/"]'
-                ]
-                
-                link = ""
-                for selector in link_selectors:
-                    link_element = product.select_one(selector)
-                    if link_element and link_element.get('href'):
-                        href = link_element['href']
-                        link = f"https://www.{domain}{href}" if href.startswith('/') else href
-                        break
-                
-                if product_name and price_text:
-                    print(f"Found product: {product_name[:50]}... - {price_text}")
-                    # Check if product matches query
-                    if is_product_match(product_name, product_info):
-                        price_clean = clean_price(price_text)
-                        
-                        if price_clean:
-                            offers.append({
-                                "link": link or amazon_url,
-                                "price": price_clean,
-                                "currency": currency,
-                                "productName": product_name,
-                                "source": f"Amazon {country}"
-                            })
-                        else:
-                            print(f"Could not clean price: {price_text}")
-                    else:
-                        print(f"Product does not match query: {product_name[:50]}...")
-                else:
-                    if not product_name:
-                        print("No product name found")
-                    if not price_text:
-                        print("No price text found")
-                
-            except Exception as e:
-                print(f"Error processing Amazon product: {e}")
-                continue
-        
-        print(f"Amazon scraper returning {len(offers)} offers")
-        return offers[:MAX_RESULTS_PER_SITE]
-        
-    except Exception as e:
-        print(f"Error scraping Amazon with requests: {e}")
-        print("Falling back to Playwright scraper...")
-        return scrape_amazon_playwright(product_info)
-
-def scrape_amazon_playwright(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Fallback Amazon scraper using Playwright."""
+    Returns the matching offers and funnel counts: product cards found, cards
+    with a name, cards with a price, cards rejected by matching, and offers kept.
+    """
     country = product_info.get('country', 'US')
-    domain = get_country_domain(country, 'amazon')
-    currency = get_currency_for_country(country)
+    currency = spec.currency or get_currency_for_country(country)
+    source = spec.source(country)
+    stats = {"products": 0, "with_name": 0, "with_price": 0, "rejected": 0, "kept": 0}
     
-    query_parts = [
-        product_info.get('brand', ''),
-        product_info.get('model', ''),
-        product_info.get('specs', '')
-    ]
-    search_query = ' '.join(filter(None, query_parts))
-    
-    if not search_query.strip():
-        return []
-    
-    amazon_url = f"https://www.{domain}/s?k={quote_plus(search_query)}"
+    with span("html.parse", bytes=len(markup)):
+        document = parse_html(markup)
+    products = []
+    for selector in spec.containers:
+        products = document.select(selector)
+        if products:
+            print(f"Found {len(products)} {source} products using selector: {selector.css}")
+            break
+    stats["products"] = len(products)
     
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.set_extra_http_headers({'User-Agent': get_random_user_agent()})
-            
-            # Set a shorter timeout
-            page.set_default_timeout(15000)
-            
-            page.goto(amazon_url, wait_until='domcontentloaded')
-            
-            # Wait briefly for content to load
-            try:
-                page.wait_for_selector('h2', timeout=10000)
-            except:
-                pass  # Continue even if selector not found
-            
-            # Get page content and use BeautifulSoup for parsing
-            content = page.content()
-            browser.close()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            offers = []
+    candidates = []
+    for product in products[:MAX_RESULTS_PER_SITE]:
+        try:
+            name_element = _first_match(product, spec.name)
+            product_name = name_element.text() if name_element else ""
+            if not product_name:
+                continue
+            stats["with_name"] += 1
             
-            # Look for any products on the page
-            products = soup.find_all(['div', 'article'], limit=20)
+            price_element = _first_match(product, spec.price)
+            price_text = price_element.text() if price_element else ""
+            # If no price element, look for any text that looks like a price
+            if not price_text and spec.price_pattern is not None:
+                price_match = spec.price_pattern.search(product.text(strip=False))
+                price_text = price_match.group() if price_match else ""
+            if not price_text:
+                continue
+            stats["with_price"] += 1
             
-            for product in products:
-                try:
-                    # Look for text that might be product names
-                    text_elements = product.find_all(['h1', 'h2', 'h3', 'span', 'a'], string=True)
-                    product_name = ""
-                    
-                    for elem in text_elements:
-                        text = elem.get_text(strip=True)
-                        if len(text) > 10 and any(word in text.lower() for word in search_query.lower().split()):
-                            product_name = text
-                            break
-                    
-                    if product_name and len(offers) < 5:
-                        # Create a basic offer even without price
-                        offers.append({
-                            "link": amazon_url,
-                            "price": "0",  # Placeholder price
-                            "currency": currency,
-                            "productName": product_name,
-                            "source": f"Amazon {country}"
-                        })
-                
-                except Exception as e:
+            link = ""
+            for selector in spec.link:
+                link_element = product.select_one(selector)
+                if link_element is not None and link_element.attr('href'):
+                    link = urljoin(page_url, link_element.attr('href'))
+                    break
+            if not link:
+                if spec.require_link:
                     continue
+                link = page_url
             
-            return offers[:MAX_RESULTS_PER_SITE]
-            
-    except Exception as e:
-        print(f"Error scraping Amazon with Playwright: {e}")
-        return []
-
-# eBay Scraper
-def scrape_ebay(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Scrape eBay for product prices."""
-    country = product_info.get('country', 'US')
-    domain = get_country_domain(country, 'ebay')
-    currency = get_currency_for_country(country)
+            candidates.append((product_name, price_text, link))
+        except Exception as e:
+            print(f"Error processing {source} product: {e}")
+            continue
     
-    query_parts = [
-        product_info.get('brand', ''),
-        product_info.get('model', ''),
-        product_info.get('specs', '')
-    ]
-    search_query = ' '.join(filter(None, query_parts))
+    # Match the whole page against the query in one batched call
+    with span("match", candidates=len(candidates)):
+        matches = get_matcher(product_info).score_batch([name for name, _, _ in candidates])
+    kept = [candidate for candidate, match in zip(candidates, matches) if match.keep]
+    rejected = len(candidates) - len(kept)
+    stats["rejected"] = rejected
+    # Parse the kept prices once, with the country's decimal and grouping separators
+    prices = parse_prices([price_text for _, price_text, _ in kept], country, currency)
+    offers = []
+    for (product_name, price_text, link), price in zip(kept, prices):
+        if price is None:
+            print(f"Could not parse price: {price_text}")
+            continue
+        offers.append(Offer(link, price.text, price.currency, product_name, source, price.amount))
+    if rejected:
+        print(f"{source}: {rejected}/{len(candidates)} products did not match the query")
     
-    if not search_query.strip():
+    stats["kept"] = len(offers)
+    return offers, stats
+
+async def extract_offers_async(markup: str, spec: RetailerSpec, product_info: Dict[str, Any],
+                               page_url: str) -> Tuple[List[Offer], Dict[str, int]]:
+    """extract_offers in the extraction process pool, or in a thread when no pool is configured.
+
+    Either way the event loop keeps serving other requests while a page is parsed.
+    """
+    source = spec.source(product_info.get('country', 'US'))
+    with span("extract", source=source, pooled=extraction_pool is not None) as extract:
+        if extraction_pool is None:
+            offers, stats = await asyncio.to_thread(extract_offers, markup, spec, product_info, page_url)
+        else:
+            offers, stats = await extraction_pool.extract(markup, spec, product_info, page_url)
+        extract.set(**stats)
+    for stage, count in stats.items():
+        retailer_funnel.inc(count, retailer=source, stage=stage)
+    return offers, stats
+
+async def scrape_with_spec(spec: RetailerSpec, product_info: Dict[str, Any]) -> List[Offer]:
+    """Fetch a retailer's search page and extract offers with its spec."""
+    search_query = build_search_query(product_info)
+    if not search_query:
         return []
     
-    ebay_url = f"https://www.{domain}/sch/i.html?_nkw={quote_plus(search_query)}"
+    country = product_info.get('country', 'US')
+    url = spec.search_url(country, quote_plus(search_query))
+    print(f"Scraping {spec.source(country)}: {url}")
     
     try:
-        response = make_request(ebay_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        offers = []
-        items = soup.find_all('div', class_='s-item')
-        
-        for item in items[:MAX_RESULTS_PER_SITE]:
-            try:
-                # Get product name
-                title_element = item.find('h3', class_='s-item__title')
-                if not title_element:
-                    continue
-                
-                product_name = title_element.get_text(strip=True)
-                
-                # Get price
-                price_element = item.find('span', class_='s-item__price')
-                if not price_element:
-                    continue
-                
-                price_text = price_element.get_text(strip=True)
-                
-                # Get link
-                link_element = item.find('a', class_='s-item__link')
-                if not link_element:
-                    continue
-                
-                link = link_element.get('href', '')
-                
-                if product_name and price_text and link:
-                    if is_product_match(product_name, product_info):
-                        price_clean = clean_price(price_text)
-                        
-                        if price_clean:
-                            offers.append({
-                                "link": link,
-                                "price": price_clean,
-                                "currency": currency,
-                                "productName": product_name,
-                                "source": f"eBay {country}"
-                            })
-            
-            except Exception as e:
-                print(f"Error processing eBay item: {e}")
-                continue
-        
-        return offers[:MAX_RESULTS_PER_SITE]
-        
+        response = await make_request(url, cache_ttl=spec.cache_ttl)
+        offers, stats = await extract_offers_async(response.text, spec, product_info, url)
+    except CircuitOpenError as e:
+        # The retailer is blocking or down; a rendered fallback would only add load
+        print(f"Skipping {spec.source(country)}: {e}")
+        return []
     except Exception as e:
-        print(f"Error scraping eBay: {e}")
+        print(f"Error scraping {spec.source(country)}: {e}")
+        if spec.render_fallback:
+            print("Falling back to Playwright scraper...")
+            return await scrape_rendered(spec, product_info)
         return []
-
-# Flipkart Scraper (India)
-def scrape_flipkart(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Scrape Flipkart for product prices."""
-    query_parts = [
-        product_info.get('brand', ''),
-        product_info.get('model', ''),
-        product_info.get('specs', '')
-    ]
-    search_query = ' '.join(filter(None, query_parts))
     
-    if not search_query.strip():
+    if stats["products"] == 0 and spec.render_fallback:
+        print("No products found with a plain request, trying with Playwright...")
+        return await scrape_rendered(spec, product_info)
+    
+    print(f"{spec.source(country)} scraper returning {len(offers)} offers")
+    return offers
+
+async def scrape_rendered(spec: RetailerSpec, product_info: Dict[str, Any]) -> List[Offer]:
+    """Extract offers with a spec from a page rendered in the shared browser pool."""
+    search_query = build_search_query(product_info)
+    if not search_query:
         return []
     
-    flipkart_url = f"https://www.flipkart.com/search?q={quote_plus(search_query)}"
+    country = product_info.get('country', 'US')
+    if not render_allowed():
+        # Browsers are the most expensive path; degraded tiers go without them
+        print(f"Skipping rendered scrape of {spec.source(country)} under load")
+        return []
+    url = spec.search_url(country, quote_plus(search_query))
     
     try:
-        response = make_request(flipkart_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        offers = []
-        # Multiple possible selectors for Flipkart products
-        product_selectors = [
-            'div[data-id]',
-            '._1AtVbE',
-            '._13oc-S',
-            '._2kHMtA'
-        ]
-        
-        items = []
-        for selector in product_selectors:
-            items = soup.select(selector)
-            if items:
-                break
-        
-        for item in items[:MAX_RESULTS_PER_SITE]:
-            try:
-                # Get product name
-                name_selectors = ['._4rR01T', '.s1Q9rs', '._2WkVRV', 'a._1fQZEK']
-                product_name = ""
-                
-                for selector in name_selectors:
-                    name_element = item.select_one(selector)
-                    if name_element:
-                        product_name = name_element.get_text(strip=True)
-                        break
-                
-                # Get price
-                price_selectors = ['._30jeq3', '._1_WHN1', '.Nx9bqj', '._3tbr2p']
-                price_text = ""
-                
-                for selector in price_selectors:
-                    price_element = item.select_one(selector)
-                    if price_element:
-                        price_text = price_element.get_text(strip=True)
-                        break
-                
-                # Get link
-                link_element = item.select_one('a._1fQZEK, a._2UzuFa')
-                link = ""
-                if link_element and link_element.get('href'):
-                    link = "https://www.flipkart.com" + link_element['href']
-                
-                if product_name and price_text and link:
-                    if is_product_match(product_name, product_info):
-                        price_clean = clean_price(price_text)
-                        
-                        if price_clean:
-                            offers.append({
-                                "link": link,
-                                "price": price_clean,
-                                "currency": "INR",
-                                "productName": product_name,
-                                "source": "Flipkart"
-                            })
-            
-            except Exception as e:
-                print(f"Error processing Flipkart item: {e}")
-                continue
-        
-        return offers[:MAX_RESULTS_PER_SITE]
-        
+        # Borrow a page from the shared browser pool and wait briefly for content
+        if fixtures.FETCH_MODE == "replay":
+            content = fixtures.load_rendered(url)
+        else:
+            with span("render", domain=domain_of(url)):
+                content = await render_page(route_url(url), wait_for=spec.render_wait_for, user_agent=get_random_user_agent())
+            if fixtures.FETCH_MODE == "record":
+                fixtures.record_rendered(url, content)
+        offers, _ = await extract_offers_async(content, spec, product_info, url)
+        return offers
     except Exception as e:
-        print(f"Error scraping Flipkart: {e}")
+        print(f"Error scraping {spec.source(country)} with Playwright: {e}")
         return []
 
+# Amazon Scraper
+async def scrape_amazon(product_info: Dict[str, Any]) -> List[Offer]:
+    """Scrape Amazon for product prices."""
+    return await scrape_with_spec(SPECS["amazon"], product_info)
+
+async def scrape_amazon_playwright(product_info: Dict[str, Any]) -> List[Offer]:
+    """Fallback Amazon scraper using Playwright."""
+    return await scrape_rendered(SPECS["amazon"], product_info)
+
+# eBay Scraper
+async def scrape_ebay(product_info: Dict[str, Any]) -> List[Offer]:
+    """Scrape eBay for product prices."""
+    return await scrape_with_spec(SPECS["ebay"], product_info)
+
+# Flipkart Scraper (India)
+async def scrape_flipkart(product_info: Dict[str, Any]) -> List[Offer]:
+    """Scrape Flipkart for product prices."""
+    return await scrape_with_spec(SPECS["flipkart"], product_info)
+
 # Generic scrapers for other sites
-def scrape_bestbuy(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_bestbuy(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape BestBuy for product prices."""
-    return _scrape_generic_site(
-        product_info,
-        "https://www.bestbuy.com/site/searchpage.jsp?st={}",
-        {
-            'product_selector': '.sku-item',
-            'name_selector': '.sku-title a',
-            'price_selector': '.pricing-current-price',
-            'link_selector': '.sku-title a'
-        },
-        "BestBuy",
-        "USD"
-    )
+    return await scrape_with_spec(SPECS["bestbuy"], product_info)
 
-def scrape_walmart(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_walmart(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Walmart for product prices."""
-    return _scrape_generic_site(
-        product_info,
-        "https://www.walmart.com/search/?query={}",
-        {
-            'product_selector': '[data-automation-id="product-title"]',
-            'name_selector': 'span',
-            'price_selector': '[data-automation-id="product-price"]',
-            'link_selector': 'a'
-        },
-        "Walmart",
-        get_currency_for_country(product_info.get('country', 'US'))
-    )
+    return await scrape_with_spec(SPECS["walmart"], product_info)
 
-def scrape_target(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_target(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Target for product prices."""
-    return _scrape_generic_site(
-        product_info,
-        "https://www.target.com/s?searchTerm={}",
-        {
-            'product_selector': '[data-test="product-details"]',
-            'name_selector': 'a',
-            'price_selector': '[data-test="product-price"]',
-            'link_selector': 'a'
-        },
-        "Target",
-        "USD"
-    )
+    return await scrape_with_spec(SPECS["target"], product_info)
 
-def _scrape_generic_site(product_info: Dict[str, Any], url_template: str, 
-                        selectors: Dict[str, str], site_name: str, currency: str) -> List[Dict[str, Any]]:
-    """Generic scraper for simple sites."""
-    query_parts = [
-        product_info.get('brand', ''),
-        product_info.get('model', ''),
-        product_info.get('specs', '')
-    ]
-    search_query = ' '.join(filter(None, query_parts))
-    
-    if not search_query.strip():
-        return []
-    
-    url = url_template.format(quote_plus(search_query))
+_generic_specs: Dict[Tuple, RetailerSpec] = {}
+
+async def _scrape_generic_site(product_info: Dict[str, Any], url_template: str, 
+                        selectors: Dict[str, str], site_name: str, currency: str) -> List[Offer]:
+    """Generic scraper for simple sites, described by single selectors.
     
-    try:
-        response = make_request(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        offers = []
-        items = soup.select(selectors['product_selector'])
-        
-        for item in items[:MAX_RESULTS_PER_SITE]:
-            try:
-                name_element = item.select_one(selectors['name_selector'])
-                price_element = item.select_one(selectors['price_selector'])
-                link_element = item.select_one(selectors['link_selector'])
-                
-                if name_element and price_element:
-                    product_name = name_element.get_text(strip=True)
-                    price_text = price_element.get_text(strip=True)
-                    link = link_element.get('href', '') if link_element else ""
-                    
-                    if is_product_match(product_name, product_info):
-                        price_clean = clean_price(price_text)
-                        
-                        if price_clean:
-                            offers.append({
-                                "link": link,
-                                "price": price_clean,
-                                "currency": currency,
-                                "productName": product_name,
-                                "source": site_name
-                            })
-            
-            except Exception as e:
-                print(f"Error processing {site_name} item: {e}")
-                continue
-        
-        return offers[:MAX_RESULTS_PER_SITE]
-        
-    except Exception as e:
-        print(f"Error scraping {site_name}: {e}")
-        return []
+    The ad-hoc spec is compiled on first use and reused for later calls.
+    """
+    key = (url_template, tuple(sorted(selectors.items())), site_name, currency)
+    spec = _generic_specs.get(key)
+    if spec is None:
+        spec = RetailerSpec(site_name, {
+            "search_url": url_template.replace("{}", "{query}"),
+            "source": site_name,
+            "currency": currency,
+            "containers": [selectors['product_selector']],
+            "name": [selectors['name_selector']],
+            "price": [selectors['price_selector']],
+            "link": [selectors['link_selector']],
+            "require_link": False,
+        })
+        _generic_specs[key] = spec
+    return await scrape_with_spec(spec, product_info)
 
 # Placeholder scrapers for other sites
-def scrape_myntra(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_myntra(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Myntra for product prices."""
     return []  # Implement as needed
 
-def scrape_snapdeal(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_snapdeal(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Snapdeal for product prices."""
     return []  # Implement as needed
 
-def scrape_paytm(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_paytm(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Paytm Mall for product prices."""
     return []  # Implement as needed
 
-def scrape_croma(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_croma(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Croma for product prices."""
     return []  # Implement as needed
 
-def scrape_reliance_digital(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_reliance_digital(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Reliance Digital for product prices."""
     return []  # Implement as needed
 
-def scrape_currys(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_currys(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Currys for product prices."""
     return []  # Implement as needed
 
-def scrape_argos(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_argos(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Argos for product prices."""
     return []  # Implement as needed
 
-def scrape_john_lewis(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_john_lewis(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape John Lewis for product prices."""
     return []  # Implement as needed
 
-def scrape_conrad(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_conrad(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Conrad for product prices."""
     return []  # Implement as needed
 
-def scrape_mediamarkt(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_mediamarkt(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape MediaMarkt for product prices."""
     return []  # Implement as needed
 
-def scrape_fnac(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_fnac(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Fnac for product prices."""
     return []  # Implement as needed
 
-def scrape_cdiscount(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_cdiscount(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Cdiscount for product prices."""
     return []  # Implement as needed
 
-def scrape_rakuten(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_rakuten(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Rakuten for product prices."""
     return []  # Implement as needed
 
-def scrape_mercadolibre(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_mercadolibre(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape MercadoLibre for product prices."""
     return []  # Implement as needed
 
-def scrape_alibaba(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_alibaba(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Alibaba for product prices."""
     return []  # Implement as needed
 
-def scrape_tmall(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_tmall(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Tmall for product prices."""
     return []  # Implement as needed
 
-def scrape_jd(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_jd(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape JD.com for product prices."""
     return []  # Implement as needed
 
-def scrape_shopee(product_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def scrape_shopee(product_info: Dict[str, Any]) -> List[Offer]:
     """Scrape Shopee for product prices."""
     return []  # Implement as needed
@@ -0,0 +1,68 @@
+# app/singleflight.py
+
+import copy
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class _Flight:
+    """One in-flight task and the number of callers still waiting on it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it runs
+    await the same task and get their own deep copy of its result (or its
+    exception). The task is shielded, so a caller that is cancelled or times
+    out does not cancel the work for the others, but once the last waiting
+    caller has gone the task is cancelled, releasing whatever it holds. The
+    key is forgotten as soon as the task finishes, so later calls start fresh
+    work.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        flight = self._inflight.get(key)
+        if flight is None:
+            # The task copies the caller's context, including its deadline
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            print(f"Joining in-flight {self.name} for {key}")
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                print(f"Cancelling {self.name} for {key}: no callers left")
+                self.abandoned += 1
+                flight.task.cancel()
+        return copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        flight = self._inflight.get(key)
+        if flight is not None and flight.task is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved so an unawaited failure is not logged
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._inflight), "started": self.started,
+                "coalesced": self.coalesced, "abandoned": self.abandoned}
@@ -0,0 +1,281 @@
+# app/tracing.py
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+# Record a span tree for each /compare request
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# Send each request's spans back in a Server-Timing response header
+TRACE_SERVER_TIMING = os.getenv("TRACE_SERVER_TIMING", "false").lower() == "true"
+# Append every finished trace to this file, one JSON document per line
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+# "json" for the app's own trace format, "otlp" for OTLP/JSON (ExportTraceServiceRequest)
+TRACE_EXPORT_FORMAT = os.getenv("TRACE_EXPORT_FORMAT", "json").lower()
+# Requests traced by the middleware, by path prefix
+TRACE_PATH_PREFIX = os.getenv("TRACE_PATH_PREFIX", "/compare")
+# Spans kept per trace, so a large batch cannot grow one without bound
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+
+SERVICE_NAME = "price-comparison"
+SERVER_TIMING_MAX_ENTRIES = 40
+
+class Span:
+    """One timed stage of a trace, with attributes and point-in-time events."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "events",
+                 "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.events: List[tuple] = []
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def event(self, name: str, **attributes: Any) -> None:
+        self.events.append((time.perf_counter_ns(), name, attributes))
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+class _NoopSpan:
+    """Stands in for a span when nothing is being traced."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def event(self, name: str, **attributes: Any) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """All spans recorded for one request (or background job)."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.epoch_ns = time.time_ns()
+        self.origin_ns = time.perf_counter_ns()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.finished = False
+
+    def start_span(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> Optional[Span]:
+        if self.finished:
+            return None
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return None
+        span = Span(self, name, parent_id, attributes)
+        self.spans.append(span)
+        return span
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def _offset_ms(self, perf_ns: int) -> float:
+        return round((perf_ns - self.origin_ns) / 1e6, 3)
+
+    def _unix_ns(self, perf_ns: int) -> str:
+        return str(self.epoch_ns + perf_ns - self.origin_ns)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: the time so far, then each span in start order."""
+        entries = [f"total;dur={self.root.duration_ms:.1f}"]
+        for span in self.spans[1:SERVER_TIMING_MAX_ENTRIES]:
+            label = span.attributes.get("retailer") or span.attributes.get("domain")
+            desc = ';desc="{}"'.format(str(label).replace('"', "'")) if label else ""
+            entries.append(f"{span.name}{desc};dur={span.duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def to_json(self) -> Dict[str, Any]:
+        """The trace in the app's own format: span offsets and durations in ms."""
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start_unix_ms": self.epoch_ns // 1_000_000,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "dropped_spans": self.dropped,
+            "spans": [{
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "name": span.name,
+                "start_ms": self._offset_ms(span.start_ns),
+                "duration_ms": round(span.duration_ms, 3),
+                "attributes": span.attributes,
+                "events": [{"name": name, "at_ms": self._offset_ms(at_ns), "attributes": attributes}
+                           for at_ns, name, attributes in span.events],
+                "error": span.error,
+            } for span in self.spans],
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest."""
+        spans = []
+        for span in self.spans:
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 2 if span.parent_id is None else 1,  # SERVER for the root, else INTERNAL
+                "startTimeUnixNano": self._unix_ns(span.start_ns),
+                "endTimeUnixNano": self._unix_ns(span.end_ns if span.end_ns is not None else span.start_ns),
+                "attributes": _otlp_attributes(span.attributes),
+                "events": [{"timeUnixNano": self._unix_ns(at_ns), "name": name,
+                            "attributes": _otlp_attributes(attributes)}
+                           for at_ns, name, attributes in span.events],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id is not None:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]}
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+# Innermost open span of the current task; tasks started under it nest their spans there
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Time a stage as a child of the current span; a no-op outside a trace."""
+    parent = current_span.get()
+    child = parent.trace.start_span(name, parent.span_id, attributes) if parent is not None else None
+    if child is None:
+        yield NOOP_SPAN
+        return
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end()
+        current_span.reset(token)
+
+def add_event(name: str, **attributes: Any) -> None:
+    """Mark a point in time (e.g. a retry) on the current span."""
+    parent = current_span.get()
+    if parent is not None and not parent.trace.finished:
+        parent.event(name, **attributes)
+
+class Tracer:
+    """Starts traces and exports them once finished."""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, export_path: str = TRACE_EXPORT_PATH,
+                 export_format: str = TRACE_EXPORT_FORMAT):
+        self.enabled = enabled
+        self.export_path = export_path
+        self.export_format = export_format
+        self._lock = threading.Lock()
+        self.traces = 0
+        self.exported = 0
+        self.export_errors = 0
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """Root span of a new trace, replacing any trace the caller was part of."""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        new_trace = Trace()
+        root = new_trace.start_span(name, None, attributes)
+        token = current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.end()
+            current_span.reset(token)
+            self.finish(new_trace)
+
+    def finish(self, trace: Trace) -> None:
+        trace.finished = True
+        self.traces += 1
+        if not self.export_path:
+            return
+        document = trace.to_otlp() if self.export_format == "otlp" else trace.to_json()
+        try:
+            line = json.dumps(document, default=str)
+            with self._lock, open(self.export_path, "a", encoding="utf-8") as export_file:
+                export_file.write(line + "\n")
+            self.exported += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.export_errors += 1
+            print(f"Could not export trace {trace.trace_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "server_timing": TRACE_SERVER_TIMING,
+            "export_path": self.export_path or None,
+            "export_format": self.export_format,
+            "traces": self.traces,
+            "exported": self.exported,
+            "export_errors": self.export_errors,
+        }
+
+tracer = Tracer()
+
+class TracingMiddleware:
+    """ASGI middleware tracing each request under TRACE_PATH_PREFIX.
+
+    The trace stays open until the response body is done, so streamed
+    comparisons are traced in full; Server-Timing can only cover the work
+    done before the response headers went out.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled or not scope["path"].startswith(TRACE_PATH_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        with tracer.trace(f"{scope['method']} {scope['path']}") as root:
+            async def send_traced(message):
+                if message["type"] == "http.response.start":
+                    root.set(status=message["status"])
+                    if TRACE_SERVER_TIMING:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"server-timing", root.trace.server_timing().encode("latin-1", "replace")))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_traced)
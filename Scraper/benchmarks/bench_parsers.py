@@ -0,0 +1,55 @@
+# benchmarks/bench_parsers.py
+
+"""Parse time per page for each HTML parser backend.
+
+Run from the Scraper directory:
+
+    python -m benchmarks.bench_parsers [--repeat 20] [--scale 4]
+
+Each measurement parses the page and walks the result containers the way the
+scrapers do (container select, then name and price select_one per item).
+"""
+
+import argparse
+import statistics
+import time
+from app.html_parser import Selector, available_backends, parse_html
+from benchmarks.sample_pages import PAGE_BUILDERS, PAGE_SELECTORS
+
+def _extract(document, selectors):
+    container, name, price = selectors
+    found = 0
+    for item in document.select(container):
+        name_element = item.select_one(name)
+        price_element = item.select_one(price)
+        if name_element and price_element and name_element.text() and price_element.text():
+            found += 1
+    return found
+
+def bench(repeat: int, scale: int) -> None:
+    backends = available_backends()
+    print(f"Backends: {', '.join(backends)}  repeat={repeat}  scale={scale}")
+    print(f"{'page':<10}{'size KB':>9}  " + "".join(f"{backend:>16}" for backend in backends))
+
+    for page_name, builder in PAGE_BUILDERS.items():
+        markup = builder(filler=40 * scale)
+        selectors = [Selector(css) for css in PAGE_SELECTORS[page_name]]
+        row = f"{page_name:<10}{len(markup) / 1024:>9.0f}  "
+        counts = set()
+        for backend in backends:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                counts.add(_extract(parse_html(markup, backend), selectors))
+                timings.append(time.perf_counter() - start)
+            row += f"{statistics.median(timings) * 1000:>13.2f} ms"
+        if len(counts) != 1:
+            row += f"  (backends disagree on item count: {sorted(counts)})"
+        print(row)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per page and backend")
+    parser.add_argument("--scale", type=int, default=4, help="multiplier for page filler size")
+    args = parser.parse_args()
+    bench(args.repeat, args.scale)
@@ -0,0 +1,221 @@
+# benchmarks/bench_scrapers.py
+
+"""Offline throughput and memory benchmark for the scrapers.
+
+Run from the Scraper directory:
+
+    python -m benchmarks.bench_scrapers                  # compare against the baseline
+    python -m benchmarks.bench_scrapers --save-baseline  # accept current numbers
+
+Scrapers run end to end (make_request, parsing, matching, price cleaning) with
+FETCH_MODE=replay, so no request leaves the machine. By default the fixture
+corpus is generated from benchmarks/sample_pages.py; pass --fixtures DIR to use
+a corpus recorded from live sites instead (FETCH_MODE=record, or --record).
+
+Reports pages/sec, offers/sec and peak traced memory per scraper, and exits
+non-zero when throughput or memory regresses past --tolerance.
+
+Raw pages/sec depends on the machine and on whatever else it is doing, so
+throughput is checked as a ratio: pages per calibration round, where a
+calibration round is a fixed parsing workload timed right before each
+scraper. The median ratio over --repeats runs is compared, with the wider
+--speed-tolerance, since timings still vary more than memory does.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict
+from urllib.parse import quote_plus
+from app import fixtures
+from app.retailer_specs import SPECS
+from app.scraper import build_search_query, scrape_amazon, scrape_ebay, scrape_flipkart, _scrape_generic_site
+from benchmarks.sample_pages import PAGE_BUILDERS, bestbuy_page
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+PRODUCT_INFO: Dict[str, Any] = {
+    "brand": "Apple",
+    "model": "iPhone 16 Pro",
+    "specs": "128GB",
+    "country": "US",
+}
+
+# A simple site driven through the generic single-selector scraper
+GENERIC_URL_TEMPLATE = "https://www.generic-shop.example/search?q={}"
+GENERIC_SELECTORS = {
+    "product_selector": ".sku-item",
+    "name_selector": ".sku-title a",
+    "price_selector": ".pricing-current-price",
+    "link_selector": ".sku-title a",
+}
+
+async def _scrape_generic(product_info: Dict[str, Any]):
+    return await _scrape_generic_site(product_info, GENERIC_URL_TEMPLATE, GENERIC_SELECTORS, "Generic Shop", "USD")
+
+SCRAPERS = {
+    "amazon": scrape_amazon,
+    "ebay": scrape_ebay,
+    "flipkart": scrape_flipkart,
+    "generic": _scrape_generic,
+}
+
+def _scraper_urls(product_info: Dict[str, Any]) -> Dict[str, str]:
+    encoded = quote_plus(build_search_query(product_info))
+    country = product_info.get("country", "US")
+    urls = {key: SPECS[key].search_url(country, encoded) for key in ("amazon", "ebay", "flipkart")}
+    urls["generic"] = GENERIC_URL_TEMPLATE.format(encoded)
+    return urls
+
+def write_synthetic_corpus(fixture_dir: str, product_info: Dict[str, Any]) -> None:
+    """Store a sample page for every URL the benchmarked scrapers will request."""
+    fixtures.configure(fixture_dir=fixture_dir)
+    builders = dict(PAGE_BUILDERS, generic=bestbuy_page)
+    for key, url in _scraper_urls(product_info).items():
+        fixtures.save_fixture(url, 200, builders[key]())
+
+async def record_corpus(fixture_dir: str, product_info: Dict[str, Any]) -> None:
+    """Fetch every benchmarked page from the live sites and save it as a fixture."""
+    fixtures.configure(mode="record", fixture_dir=fixture_dir)
+    for name, scraper in SCRAPERS.items():
+        offers = await scraper(product_info)
+        print(f"Recorded {name}: {len(offers)} offers")
+
+async def _run(scraper, product_info: Dict[str, Any], pages: int) -> int:
+    offers = 0
+    for _ in range(pages):
+        offers += len(await scraper(product_info))
+    return offers
+
+# Calibration: regex, float and JSON work over a fixed page, independent of the app's code
+_CALIBRATION_PAGE = "".join(
+    f'<li class="item"><a href="/p/{i}">Product {i} 128GB</a><span>${i % 900 + 99}.99</span></li>'
+    for i in range(400)
+)
+_CALIBRATION_ITEM = re.compile(r'<a href="([^"]+)">([^<]+)</a><span>\$([\d.]+)</span>')
+
+def _calibration_round() -> int:
+    items = [(link, name, float(price)) for link, name, price in _CALIBRATION_ITEM.findall(_CALIBRATION_PAGE)]
+    items.sort(key=lambda item: item[2])
+    return len(json.loads(json.dumps(items)))
+
+def calibrate(rounds: int = 100) -> float:
+    """Calibration rounds per second on this machine right now."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        _calibration_round()
+    return rounds / (time.perf_counter() - start)
+
+def measure(name: str, pages: int, repeats: int = 3) -> Dict[str, float]:
+    scraper = SCRAPERS[name]
+    # The scrapers log every step; keep that out of the timings and the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(_run(scraper, PRODUCT_INFO, 1))  # Warm-up: selector and matcher caches
+
+        # Each run is paired with a calibration just before it, so both see the
+        # same machine load; the medians over all runs are reported
+        timings = []
+        ratios = []
+        for _ in range(repeats):
+            calibration = calibrate()
+            start = time.perf_counter()
+            offers = asyncio.run(_run(scraper, PRODUCT_INFO, pages))
+            run_elapsed = time.perf_counter() - start
+            timings.append(run_elapsed)
+            ratios.append(pages / run_elapsed / calibration)
+        elapsed = statistics.median(timings)
+
+        # Memory is traced on a separate single page, since tracing slows everything down
+        tracemalloc.start()
+        asyncio.run(_run(scraper, PRODUCT_INFO, 1))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "pages_per_sec": round(pages / elapsed, 2),
+        "pages_per_calibration": round(statistics.median(ratios), 4),
+        "offers_per_sec": round(offers / elapsed, 2),
+        "offers_per_page": round(offers / pages, 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+def check(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float,
+          speed_tolerance: float) -> list:
+    """Regressions against the baseline, as human-readable strings."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        # Older baselines only have the machine-dependent pages/sec
+        speed = "pages_per_calibration" if "pages_per_calibration" in base else "pages_per_sec"
+        if current[speed] < base[speed] * (1 - speed_tolerance):
+            regressions.append(f"{name}: {speed} {current[speed]} < baseline {base[speed]}")
+        if current["peak_memory_kb"] > base["peak_memory_kb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak memory {current['peak_memory_kb']} KB > baseline {base['peak_memory_kb']} KB")
+        if current["offers_per_page"] != base["offers_per_page"]:
+            regressions.append(f"{name}: offers/page {current['offers_per_page']} != baseline {base['offers_per_page']}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50, help="pages scraped per scraper")
+    parser.add_argument("--repeats", type=int, default=7, help="timed runs per scraper; the median is kept")
+    parser.add_argument("--fixtures", help="fixture directory (default: generated synthetic corpus)")
+    parser.add_argument("--record", action="store_true", help="record the --fixtures corpus from live sites first")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative memory regression")
+    parser.add_argument("--speed-tolerance", type=float, default=0.35,
+                        help="allowed relative throughput regression (pages per calibration round)")
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.fixtures:
+            parser.error("--record needs --fixtures")
+        asyncio.run(record_corpus(args.fixtures, PRODUCT_INFO))
+
+    with tempfile.TemporaryDirectory() as synthetic_dir:
+        fixture_dir = args.fixtures or synthetic_dir
+        if not args.fixtures:
+            write_synthetic_corpus(fixture_dir, PRODUCT_INFO)
+        fixtures.configure(mode="replay", fixture_dir=fixture_dir)
+
+        print(f"{'scraper':<10}{'pages/s':>10}{'relative':>10}{'offers/s':>10}{'offers/page':>13}{'peak KB':>10}")
+        results = {}
+        for name in SCRAPERS:
+            results[name] = measure(name, args.pages, max(1, args.repeats))
+            r = results[name]
+            print(f"{name:<10}{r['pages_per_sec']:>10.1f}{r['pages_per_calibration']:>10.3f}{r['offers_per_sec']:>10.1f}"
+                  f"{r['offers_per_page']:>13.1f}{r['peak_memory_kb']:>10.1f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        regressions = check(results, json.load(f), args.tolerance, args.speed_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions against {args.baseline} "
+              f"(memory tolerance {args.tolerance:.0%}, speed tolerance {args.speed_tolerance:.0%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
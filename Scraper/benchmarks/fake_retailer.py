@@ -0,0 +1,139 @@
+# benchmarks/fake_retailer.py
+
+"""Local stand-in for the retailer sites, for load testing /compare offline.
+
+Run from the Scraper directory, then point the app at it:
+
+    python -m benchmarks.fake_retailer --port 9000 --latency 0.3 --throttle-rate 0.02
+    RETAILER_OVERRIDE_URL=http://127.0.0.1:9000 uvicorn app.main:app
+
+Requests arrive as /{retailer host}/{path}?{query} (see route_url in
+app/scraper.py). The host picks the page markup from benchmarks/sample_pages.py,
+so each scraper's selectors match as they would on the real site. Behaviour is
+configurable per site with --site, e.g. --site amazon:latency=1.5,error_rate=0.1.
+"""
+
+import argparse
+import asyncio
+import random
+import zlib
+from typing import Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
+import uvicorn
+from benchmarks.sample_pages import PAGE_BUILDERS
+
+# Variants pre-rendered per site; the query picks one so results differ between queries
+PAGE_VARIANTS = 8
+
+class SiteBehaviour:
+    """Latency, failure and page-size settings for one fake site."""
+
+    FIELDS = ("latency", "jitter", "error_rate", "throttle_rate", "retry_after", "items", "filler")
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.1, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1, items: Optional[int] = None,
+                 filler: int = 40):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.items = items
+        self.filler = filler
+
+    def updated(self, overrides: str) -> "SiteBehaviour":
+        """Copy with "key=value,key=value" overrides applied."""
+        values = {field: getattr(self, field) for field in self.FIELDS}
+        for pair in filter(None, overrides.split(",")):
+            key, _, value = pair.partition("=")
+            if key not in self.FIELDS:
+                raise ValueError(f"Unknown site setting '{key}'. Choose from {self.FIELDS}")
+            values[key] = int(value) if key in ("items", "filler", "retry_after") else float(value)
+        return SiteBehaviour(**values)
+
+def _site_for_host(host: str) -> Optional[str]:
+    for site in PAGE_BUILDERS:
+        if site in host:
+            return site
+    return None
+
+def create_app(default: SiteBehaviour, overrides: Dict[str, SiteBehaviour], seed: int = 0) -> FastAPI:
+    behaviours = {site: overrides.get(site, default) for site in PAGE_BUILDERS}
+    rng = random.Random(seed)
+    stats: Dict[str, Dict[str, int]] = {site: {"ok": 0, "errors": 0, "throttled": 0} for site in PAGE_BUILDERS}
+
+    # Pages are built once up front so serving them costs no more than a real static page
+    pages: Dict[str, List[str]] = {}
+    for site, builder in PAGE_BUILDERS.items():
+        behaviour = behaviours[site]
+        kwargs = {"filler": behaviour.filler}
+        if behaviour.items is not None:
+            kwargs["items"] = behaviour.items
+        pages[site] = [builder(seed=variant + 1, **kwargs) for variant in range(PAGE_VARIANTS)]
+
+    app = FastAPI(title="Fake retailer")
+
+    @app.get("/_stats")
+    async def site_stats():
+        return stats
+
+    @app.get("/{host}/{path:path}")
+    async def serve(host: str, path: str, request: Request):
+        site = _site_for_host(host)
+        if site is None:
+            return PlainTextResponse(f"No fake site for {host}", status_code=404)
+        behaviour = behaviours[site]
+
+        delay = behaviour.latency + rng.uniform(-behaviour.jitter, behaviour.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < behaviour.throttle_rate:
+            stats[site]["throttled"] += 1
+            status = 429 if rng.random() < 0.5 else 503
+            return PlainTextResponse("Slow down", status_code=status,
+                                     headers={"Retry-After": str(behaviour.retry_after)})
+        if roll < behaviour.throttle_rate + behaviour.error_rate:
+            stats[site]["errors"] += 1
+            return PlainTextResponse("Internal error", status_code=500)
+
+        stats[site]["ok"] += 1
+        variant = zlib.crc32(str(request.url.query).encode("utf-8")) % PAGE_VARIANTS
+        return HTMLResponse(pages[site][variant])
+
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.2, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="uniform +/- jitter on the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429/503 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on throttled responses")
+    parser.add_argument("--items", type=int, help="products per page (default: per-site sample size)")
+    parser.add_argument("--filler", type=int, default=40, help="filler blocks per page, controls page size")
+    parser.add_argument("--site", action="append", default=[], metavar="SITE:KEY=VALUE,...",
+                        help="per-site override, e.g. amazon:latency=1.5,error_rate=0.1")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    default = SiteBehaviour(args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                            args.retry_after, args.items, args.filler)
+    overrides = {}
+    for spec in args.site:
+        site, _, settings = spec.partition(":")
+        if site not in PAGE_BUILDERS:
+            parser.error(f"Unknown site '{site}'. Choose from {list(PAGE_BUILDERS)}")
+        try:
+            overrides[site] = default.updated(settings)
+        except ValueError as e:
+            parser.error(str(e))
+
+    uvicorn.run(create_app(default, overrides, args.seed), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
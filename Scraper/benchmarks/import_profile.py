@@ -0,0 +1,117 @@
+# benchmarks/import_profile.py
+
+"""Import-time profile of the app's cold start.
+
+Run from the Scraper directory:
+
+    python -m benchmarks.import_profile                # report and check the budget
+    python -m benchmarks.import_profile --top 30 --budget-ms 1500
+
+Imports app.main in fresh interpreters under ``python -X importtime`` and
+reports which modules cost the most, both as direct imports of the app
+(cumulative) and individually (self time). The fastest of --runs is kept to
+damp disk-cache noise.
+
+Exits non-zero when the import takes longer than --budget-ms, or when one of
+the --forbid modules is loaded at import time. Those are the heavy
+dependencies that are supposed to load only on first use.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+# Heavy dependencies that must stay out of the cold-start import path
+FORBIDDEN_AT_STARTUP = (
+    "google.generativeai",
+    "playwright",
+    "bs4",
+    "rapidfuzz",
+    "app.scraper",
+    "multiprocessing",
+)
+
+class ImportRecord(NamedTuple):
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+def profile_imports(module: str) -> List[ImportRecord]:
+    """Import ``module`` in a fresh interpreter and parse its -X importtime output."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    records = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(ImportRecord(
+            name.strip(), (len(name) - len(name.lstrip()) - 1) // 2, int(self_us), int(cumulative_us)
+        ))
+    return records
+
+def summarize(records: List[ImportRecord], module: str) -> Dict[str, object]:
+    """Total time, the app's direct imports and the most expensive modules."""
+    end = max(index for index, record in enumerate(records) if record.module == module)
+    total = records[end]
+    # -X importtime prints children before their parent, so the target's imports
+    # are the records after the previous top-level import
+    start = end
+    while start > 0 and records[start - 1].depth > total.depth:
+        start -= 1
+    direct = [record for record in records[start:end] if record.depth == total.depth + 1]
+    return {
+        "total_ms": total.cumulative_us / 1000,
+        "direct": sorted(direct, key=lambda record: record.cumulative_us, reverse=True),
+        "by_self": sorted(records, key=lambda record: record.self_us, reverse=True),
+        "loaded": {record.module for record in records},
+    }
+
+def forbidden_loaded(loaded: set, forbidden: List[str]) -> List[str]:
+    return sorted(name for name in forbidden
+                  if any(module == name or module.startswith(name + ".") for module in loaded))
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main", help="module to import")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to try; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    parser.add_argument("--budget-ms", type=float, default=1000, help="fail above this import time")
+    parser.add_argument("--forbid", nargs="*", default=list(FORBIDDEN_AT_STARTUP),
+                        help="modules that must not be imported at startup")
+    args = parser.parse_args()
+
+    summary = min((summarize(profile_imports(args.module), args.module) for _ in range(max(1, args.runs))),
+                  key=lambda result: result["total_ms"])
+
+    print(f"import {args.module}: {summary['total_ms']:.1f} ms (best of {args.runs})\n")
+    print(f"{'direct import':<40}{'cumulative ms':>15}")
+    for record in summary["direct"][:args.top]:
+        print(f"{record.module:<40}{record.cumulative_us / 1000:>15.1f}")
+    print(f"\n{'module':<40}{'self ms':>15}")
+    for record in summary["by_self"][:args.top]:
+        print(f"{record.module:<40}{record.self_us / 1000:>15.1f}")
+    print()
+
+    failures = []
+    loaded = forbidden_loaded(summary["loaded"], args.forbid)
+    if loaded:
+        failures.append(f"loaded at startup: {', '.join(loaded)}")
+    if summary["total_ms"] > args.budget_ms:
+        failures.append(f"import took {summary['total_ms']:.1f} ms, budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print(f"Within the {args.budget_ms:.0f} ms budget; no deferred module loaded at startup")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
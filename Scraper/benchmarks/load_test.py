@@ -0,0 +1,105 @@
+# benchmarks/load_test.py
+
+"""Open-loop load generator for the /compare endpoint.
+
+Start the fake retailers and the app pointed at them, then run from the
+Scraper directory:
+
+    python -m benchmarks.fake_retailer --port 9000 &
+    RETAILER_OVERRIDE_URL=http://127.0.0.1:9000 ENABLE_CACHING=false DOMAIN_RATE_LIMIT=0 uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_test --qps 20 --duration 30
+
+Requests are sent on a fixed schedule regardless of how fast earlier ones
+complete, so queueing inside the app shows up as latency instead of being
+hidden by a slower send rate. Leave GOOGLE_API_KEY unset to exercise the
+fallback query parser instead of calling Gemini.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List
+import httpx
+
+QUERIES = [
+    ("US", "Apple iPhone 16 Pro 128GB"),
+    ("US", "Samsung Galaxy S24 Ultra 256GB"),
+    ("US", "Sony WH-1000XM5"),
+    ("US", "Apple MacBook Air M2"),
+    ("US", "Google Pixel 9 Pro"),
+    ("IN", "boAt Airdopes 311 Pro"),
+    ("IN", "Apple iPhone 15 Pro"),
+    ("GB", "Apple iPhone 16 Pro Max 256GB"),
+]
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+async def _one(client: httpx.AsyncClient, url: str, results: List[Dict], rng: random.Random) -> None:
+    country, query = rng.choice(QUERIES)
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json={"country": country, "query": query})
+        status = str(response.status_code)
+        body = response.json() if response.status_code == 200 else {}
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+        body = {}
+    results.append({
+        "latency": time.perf_counter() - start,
+        "status": status,
+        "offers": len(body.get("results", [])),
+        "mock": bool(body.get("note")),
+    })
+
+async def run(base_url: str, qps: float, duration: float, timeout: float, seed: int) -> List[Dict]:
+    url = f"{base_url.rstrip('/')}/compare"
+    rng = random.Random(seed)
+    results: List[Dict] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - start < duration:
+            # Catch up on the schedule rather than drifting when the loop is busy
+            due = int((time.perf_counter() - start) * qps) + 1
+            while sent < due:
+                tasks.append(asyncio.create_task(_one(client, url, results, rng)))
+                sent += 1
+            await asyncio.sleep(1 / qps)
+        await asyncio.gather(*tasks)
+    return results
+
+def report(results: List[Dict], duration: float) -> None:
+    if not results:
+        print("No requests completed")
+        return
+    latencies = sorted(r["latency"] for r in results)
+    ok = [r for r in results if r["status"] == "200"]
+    statuses = Counter(r["status"] for r in results)
+    print(f"requests     {len(results)} in {duration:.0f}s ({len(results) / duration:.1f}/s offered)")
+    print(f"statuses     {dict(statuses)}")
+    print(f"latency      p50 {_percentile(latencies, 0.50):.3f}s  p95 {_percentile(latencies, 0.95):.3f}s  "
+          f"p99 {_percentile(latencies, 0.99):.3f}s  max {latencies[-1]:.3f}s")
+    if ok:
+        print(f"offers       {statistics.mean(r['offers'] for r in ok):.1f} per response, "
+              f"{sum(r['mock'] for r in ok) / len(ok):.0%} mock responses")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of the app")
+    parser.add_argument("--qps", type=float, default=10, help="requests started per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to keep sending")
+    parser.add_argument("--timeout", type=float, default=60, help="client timeout per request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.qps, args.duration, args.timeout, args.seed))
+    report(results, args.duration)
+
+if __name__ == "__main__":
+    main()
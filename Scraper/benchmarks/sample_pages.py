@@ -0,0 +1,153 @@
+# benchmarks/sample_pages.py
+
+"""Synthetic search-result pages in the markup each scraper expects.
+
+The pages are deterministic for a given seed, and padded with navigation,
+inline scripts and filler markup so their size and structure resemble real
+retailer result pages.
+"""
+
+import random
+from typing import Callable, Dict, List
+
+PRODUCT_NAMES = [
+    "Apple iPhone 16 Pro 128GB Natural Titanium",
+    "Apple iPhone 16 Pro 256GB Black Titanium",
+    "Apple iPhone 16 Pro Max 256GB Desert Titanium",
+    "Apple iPhone 15 Pro 128GB Blue Titanium",
+    "Samsung Galaxy S24 Ultra 256GB Phantom Black",
+    "boAt Airdopes 311 Pro True Wireless Earbuds",
+    "boAt Airdopes 141 Bluetooth Earbuds",
+    "Sony WH-1000XM5 Wireless Noise Cancelling Headphones",
+    "Apple MacBook Air M2 13-inch 256GB",
+    "Google Pixel 9 Pro 128GB Obsidian",
+]
+
+def _filler(rng: random.Random, blocks: int) -> str:
+    """Navigation, scripts and hidden markup that real pages carry around results."""
+    parts = []
+    for i in range(blocks):
+        links = "".join(f'<li class="nav-item"><a href="/c/{i}/{j}">Category {i}-{j}</a></li>' for j in range(8))
+        script = "var d=" + ",".join(str(rng.randint(0, 99999)) for _ in range(60)) + ";"
+        parts.append(f'<div class="nav-block" id="nav-{i}"><ul>{links}</ul><script>{script}</script>'
+                     f'<span class="sr-only">Skip to content {i}</span></div>')
+    return "".join(parts)
+
+def _price(rng: random.Random, name: str) -> float:
+    base = 2999 if "boAt" in name else 999
+    return round(base * rng.uniform(0.85, 1.25), 2)
+
+def amazon_page(items: int = 48, filler: int = 40, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    results = []
+    for i in range(items):
+        name = rng.choice(PRODUCT_NAMES)
+        price = _price(rng, name)
+        whole, fraction = f"{price:.2f}".split(".")
+        results.append(
+            f'<div data-component-type="s-search-result" data-asin="B0{i:08d}" class="s-result-item s-asin">'
+            f'<div class="a-section"><h2><a class="a-link-normal" href="/dp/B0{i:08d}">'
+            f'<span class="a-size-medium a-text-normal">{name}</span></a></h2>'
+            f'<div class="a-row"><span class="a-price"><span class="a-offscreen">${price:,.2f}</span>'
+            f'<span class="a-price-symbol">$</span><span class="a-price-whole">{int(whole):,}</span>'
+            f'<span class="a-price-fraction">{fraction}</span></span></div>'
+            f'<div class="a-row"><span class="a-icon-alt">4.{rng.randint(0, 9)} out of 5 stars</span></div>'
+            f'</div></div>'
+        )
+    return _document("Amazon.com : search", filler, rng, "".join(results))
+
+def ebay_page(items: int = 60, filler: int = 30, seed: int = 2) -> str:
+    rng = random.Random(seed)
+    results = []
+    for i in range(items):
+        name = rng.choice(PRODUCT_NAMES)
+        price = _price(rng, name)
+        results.append(
+            f'<li class="s-item__wrapper"><div class="s-item"><div class="s-item__info">'
+            f'<a class="s-item__link" href="https://www.ebay.com/itm/{100000 + i}">'
+            f'<h3 class="s-item__title">{name}</h3></a>'
+            f'<div class="s-item__details"><span class="s-item__price">${price:,.2f}</span>'
+            f'<span class="s-item__shipping">Free shipping</span></div></div></div></li>'
+        )
+    return _document("iphone | eBay", filler, rng, f'<ul class="srp-results">{"".join(results)}</ul>')
+
+def flipkart_page(items: int = 40, filler: int = 30, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    results = []
+    for i in range(items):
+        name = rng.choice(PRODUCT_NAMES)
+        price = _price(rng, name)
+        results.append(
+            f'<div class="_1AtVbE"><div class="_13oc-S"><a class="_1fQZEK" href="/item/p/itm{i:06d}">'
+            f'<div class="_4rR01T">{name}</div>'
+            f'<div class="_30jeq3">₹{price:,.0f}</div></a></div></div>'
+        )
+    return _document("Flipkart search", filler, rng, "".join(results))
+
+def bestbuy_page(items: int = 24, filler: int = 30, seed: int = 4) -> str:
+    rng = random.Random(seed)
+    results = []
+    for i in range(items):
+        name = rng.choice(PRODUCT_NAMES)
+        price = _price(rng, name)
+        results.append(
+            f'<li class="sku-item" data-sku-id="{6500000 + i}"><h4 class="sku-title">'
+            f'<a href="/site/p/{6500000 + i}.p">{name}</a></h4>'
+            f'<div class="pricing-current-price"><span>${price:,.2f}</span></div></li>'
+        )
+    return _document("Best Buy search", filler, rng, f'<ol class="sku-item-list">{"".join(results)}</ol>')
+
+def walmart_page(items: int = 40, filler: int = 30, seed: int = 5) -> str:
+    rng = random.Random(seed)
+    results = []
+    for i in range(items):
+        name = rng.choice(PRODUCT_NAMES)
+        price = _price(rng, name)
+        results.append(
+            f'<div class="mb1 ph1 pa0-xl"><div data-automation-id="product-title">'
+            f'<a href="/ip/{900000 + i}"><span>{name}</span></a>'
+            f'<div data-automation-id="product-price"><span>${price:,.2f}</span></div></div></div>'
+        )
+    return _document("Walmart.com search", filler, rng, "".join(results))
+
+def target_page(items: int = 24, filler: int = 30, seed: int = 6) -> str:
+    rng = random.Random(seed)
+    results = []
+    for i in range(items):
+        name = rng.choice(PRODUCT_NAMES)
+        price = _price(rng, name)
+        results.append(
+            f'<div data-test="@web/site-top-of-funnel/ProductCardWrapper"><div data-test="product-details">'
+            f'<a href="/p/-/A-{80000000 + i}">{name}</a>'
+            f'<span data-test="product-price">${price:,.2f}</span></div></div>'
+        )
+    return _document("Target search", filler, rng, "".join(results))
+
+def _document(title: str, filler: int, rng: random.Random, results: str) -> str:
+    return (
+        f'<!DOCTYPE html><html><head><title>{title}</title>'
+        f'<style>.a{{color:red}}</style></head><body>'
+        f'<header>{_filler(rng, filler // 2)}</header>'
+        f'<main id="search">{results}</main>'
+        f'<footer>{_filler(rng, filler - filler // 2)}</footer>'
+        f'</body></html>'
+    )
+
+PAGE_BUILDERS: Dict[str, Callable[..., str]] = {
+    "amazon": amazon_page,
+    "ebay": ebay_page,
+    "flipkart": flipkart_page,
+    "bestbuy": bestbuy_page,
+    "walmart": walmart_page,
+    "target": target_page,
+}
+
+# Container, name and price selectors exercised by the parser benchmark
+PAGE_SELECTORS: Dict[str, List[str]] = {
+    "amazon": ['[data-component-type="s-search-result"]', 'h2 a span', '.a-price .a-offscreen'],
+    "ebay": ['div.s-item', 'h3.s-item__title', 'span.s-item__price'],
+    "flipkart": ['._1AtVbE', '._4rR01T', '._30jeq3'],
+    "bestbuy": ['.sku-item', '.sku-title a', '.pricing-current-price'],
+    "walmart": ['[data-automation-id="product-title"]', 'span', '[data-automation-id="product-price"]'],
+    "target": ['[data-test="product-details"]', 'a', '[data-test="product-price"]'],
+}
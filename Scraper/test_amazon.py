@@ -1,3 +1,4 @@
+import asyncio
 from app.scraper import scrape_amazon
 from app.llm_utils import parse_query_with_llm
 
@@ -8,7 +9,7 @@ product_info['country'] = 'US'
 
 print(f"Testing Amazon scraping with product_info: {product_info}")
 
-offers = scrape_amazon(product_info)
+offers = asyncio.run(scrape_amazon(product_info))
 print(f"Amazon returned {len(offers)} offers")
 for offer in offers:
     print(f"  - {offer}")
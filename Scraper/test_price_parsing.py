@@ -0,0 +1,24 @@
+from app.pricing import parse_price
+
+# Retailer price text, read with each country's separators and currency
+def test_grouping_and_decimals_by_country():
+    assert parse_price("$1,299.99", "US").amount == 1299.99
+    assert parse_price("1.299,99 €", "DE").amount == 1299.99
+    assert parse_price("1.299", "DE").amount == 1299
+    assert parse_price("1,299", "US").amount == 1299
+
+def test_zero_decimal_currency_groups_only_three_digits():
+    assert parse_price("₫1.299.000", "VN").amount == 1299000
+    assert parse_price("¥1,299", "JP", "JPY").amount == 1299
+    assert parse_price("Rp 15.999", "ID").amount == 15999
+
+def test_zero_decimal_currency_rounds_a_decimal_part():
+    assert parse_price("99.99", "VN", "VND").amount == 100
+    assert parse_price("₩12,345.5", "KR").amount == 12346
+    assert parse_price("99.99", "VN").amount == 99.99
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,26 @@
+from app.llm_utils import canonicalize_query
+
+# Query keys share the parse cache and in-flight comparisons, so distinct
+# products must never map to the same key
+def test_trivial_differences_share_a_key():
+    assert canonicalize_query("iPhone 16 Pro, 128GB") == canonicalize_query("  iphone 16 pro 128gb ")
+    assert canonicalize_query("Ｓｏｎｙ　ＷＨ－１０００ＸＭ５") == canonicalize_query("sony wh 1000xm5")
+
+def test_non_latin_queries_keep_their_text():
+    sony = canonicalize_query("ソニー ヘッドホン")
+    nintendo = canonicalize_query("任天堂 スイッチ")
+    assert sony and nintendo and sony != nintendo
+    assert canonicalize_query("โทรศัพท์ซัมซุง") != canonicalize_query("โทรศัพท์ซัมซง")
+
+def test_plus_is_part_of_the_model():
+    assert canonicalize_query("Galaxy S24+") == "galaxy s24+"
+    assert canonicalize_query("Galaxy S24+") != canonicalize_query("Galaxy S24")
+
+def test_punctuation_only_query_has_no_key():
+    assert canonicalize_query("!!! ???") == ""
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
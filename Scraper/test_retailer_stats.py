@@ -0,0 +1,47 @@
+import os
+
+# Small figures so a retailer warms up, slows down and gets skipped within a second or two
+os.environ.setdefault("RETAILER_STATS_MIN_SAMPLES", "3")
+os.environ.setdefault("RETAILER_MIN_TIMEOUT_SECONDS", "0.05")
+os.environ.setdefault("RETAILER_SKIP_AFTER_EMPTY", "4")
+
+import asyncio
+from app.deadline import Deadline
+from app.main import RETAILER_BUDGET_SECONDS, _scrape_retailer, retailer_stats
+from app.models import Offer
+from app.retailer_stats import RETAILER_SKIP_AFTER_EMPTY
+
+PRODUCT_INFO = {"brand": "Apple", "model": "iPhone 16", "country": "US"}
+
+def test_slow_retailer_is_recorded_when_its_timeout_cuts_it_off():
+    delay = {"seconds": 0.01}
+
+    async def scrape(product_info):
+        await asyncio.sleep(delay["seconds"])
+        return [Offer("https://example.com/p", "10", "USD", "Apple iPhone 16", "Slow Shop", 10.0)]
+
+    retailer = {"name": "Slow Shop", "scrape_func": scrape}
+    stats = retailer_stats.get("Slow Shop")
+
+    async def run(times):
+        for _ in range(times):
+            await _scrape_retailer(retailer, PRODUCT_INFO, Deadline(5))
+
+    asyncio.run(run(3))
+    assert stats.warmed_up and stats.consecutive_empty == 0
+    warm_timeout = stats.timeout(RETAILER_BUDGET_SECONDS)
+
+    # The retailer slows past its timeout: every scrape is cut off, and each one still counts
+    delay["seconds"] = 10
+    samples = stats.samples
+    asyncio.run(run(RETAILER_SKIP_AFTER_EMPTY))
+    assert stats.samples == samples + RETAILER_SKIP_AFTER_EMPTY
+    assert stats.timeout(RETAILER_BUDGET_SECONDS) > warm_timeout
+    assert stats.consecutive_empty == RETAILER_SKIP_AFTER_EMPTY
+    assert retailer_stats.schedule([retailer]) == []
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")